@@ -0,0 +1,247 @@
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from database import DatabaseConnection
+from models import StudentManager, CourseManager, EnrollmentManager
+from reports import gpa_from_grades, iter_student_courses
+
+
+def list_students(db):
+    return [s.to_dict() for s in StudentManager(db).get_all_students()]
+
+
+def get_student(db, student_id):
+    student = StudentManager(db).get_student_by_id(int(student_id), include_archived=True)
+    return student.to_dict() if student else None
+
+
+def list_courses(db):
+    return [c.to_dict() for c in CourseManager(db).get_all_courses()]
+
+
+def get_course(db, course_id):
+    course = CourseManager(db).get_course_by_id(int(course_id))
+    return course.to_dict() if course else None
+
+
+def get_transcript(db, student_id):
+    student = StudentManager(db).get_student_by_id(int(student_id), include_archived=True)
+    if not student:
+        return None
+    enroll_mgr = EnrollmentManager(db)
+    grades = enroll_mgr.get_grades_for_student(student.id, include_archived=True)
+    return {
+        "student": student.to_dict(),
+        "courses": [{"course_code": code, "course_name": name, "credits": credits, "grade": grade}
+                    for code, name, credits, grade in grades],
+        "gpa": enroll_mgr.calculate_gpa(student.id, include_archived=True),
+    }
+
+
+def gpa_report(db):
+    rows = []
+    for (sid, name, email, major, year), courses in iter_student_courses(db):
+        grades = [c[1:] for c in courses]
+        rows.append({
+            "id": sid, "name": name, "email": email, "major": major, "year": year,
+            "gpa": gpa_from_grades(grades),
+            "total_credits": sum(c for _, _, c, g in grades if g is not None),
+            "graded_courses": len([g for g in grades if g[3] is not None]),
+        })
+    rows.sort(key=lambda r: (r["name"], r["id"]))
+    return rows
+
+
+# (endpoint name, path pattern, handler)
+ROUTES = [
+    ("students", re.compile(r"^/students/?$"), list_students),
+    ("student", re.compile(r"^/students/(\d+)/?$"), get_student),
+    ("transcript", re.compile(r"^/students/(\d+)/transcript/?$"), get_transcript),
+    ("courses", re.compile(r"^/courses/?$"), list_courses),
+    ("course", re.compile(r"^/courses/(\d+)/?$"), get_course),
+    ("gpa_report", re.compile(r"^/reports/gpa/?$"), gpa_report),
+]
+
+
+class ApiState:
+    """
+    Shared state of the API server: per-thread read-only connections, the response cache and
+    latency metrics. The cache is dropped whenever PRAGMA data_version on a watcher connection
+    changes, i.e. whenever any other connection (main.py, an import, ...) commits a write.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        # Only ever used under self._lock, so it may be shared by all request threads
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        self._watcher = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._data_version = None
+        self.generation = 0
+
+        self._cache: Dict[str, Tuple[bytes, str]] = {}
+        self.metrics: Dict[str, Dict] = {}
+
+    def connection(self) -> DatabaseConnection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Read-only, so there is never anything to commit; it is closed with its thread
+            db = DatabaseConnection(self.db_path, read_only=True).__enter__()
+            self._local.db = db
+        return db
+
+    def check_version(self) -> int:
+        """Invalidate the cache if the database changed; returns the current cache generation."""
+        with self._lock:
+            version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._data_version:
+                self._data_version = version
+                self._cache.clear()
+                self.generation += 1
+            return self.generation
+
+    def cached(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            return self._cache.get(key)
+
+    def store(self, key: str, generation: int, body: bytes, etag: str):
+        with self._lock:
+            if generation == self.generation:  # skip results computed before an invalidation
+                self._cache[key] = (body, etag)
+
+    def record(self, endpoint: str, seconds: float, cache_hit: bool, error: bool = False):
+        with self._lock:
+            m = self.metrics.setdefault(endpoint, {"requests": 0, "cache_hits": 0, "errors": 0,
+                                                   "total_ms": 0.0, "max_ms": 0.0})
+            m["requests"] += 1
+            m["cache_hits"] += cache_hit
+            m["errors"] += error
+            m["total_ms"] += seconds * 1000
+            m["max_ms"] = max(m["max_ms"], seconds * 1000)
+
+    def metrics_report(self) -> Dict:
+        with self._lock:
+            return {name: {**m, "avg_ms": round(m["total_ms"] / m["requests"], 3),
+                           "total_ms": round(m["total_ms"], 3), "max_ms": round(m["max_ms"], 3)}
+                    for name, m in self.metrics.items()}
+
+    def close(self):
+        with self._lock:
+            self._watcher.close()
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    timeout = 5  # seconds an idle keep-alive connection may hold a worker thread
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    state: ApiState = None
+
+    def do_GET(self):
+        start = time.perf_counter()
+        path = urlparse(self.path).path
+
+        if path == "/metrics":
+            self._send(200, json.dumps(self.state.metrics_report()).encode())
+            return
+
+        for endpoint, pattern, handler in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            self._send(404, b'{"error": "Not found"}')
+            return
+
+        generation = self.state.check_version()
+        hit = self.state.cached(path)
+        if hit is None:
+            try:
+                result = handler(self.state.connection(), *match.groups())
+            except OverflowError:
+                result = None  # an id beyond SQLite's integer range cannot exist
+            except Exception as e:
+                self._send(500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode())
+                self.state.record(endpoint, time.perf_counter() - start, False, error=True)
+                return
+            if result is None:
+                self._send(404, b'{"error": "Not found"}')
+                self.state.record(endpoint, time.perf_counter() - start, False)
+                return
+            body = json.dumps(result).encode()
+            etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            self.state.store(path, generation, body, etag)
+        else:
+            body, etag = hit
+
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", etag)
+        else:
+            self._send(200, body, etag)
+        self.state.record(endpoint, time.perf_counter() - start, hit is not None)
+
+    def _send(self, status: int, body: bytes, etag: str = None):
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # per-request logging to stderr would dominate the latency
+
+
+class ApiServer(ThreadingHTTPServer):
+    """Threading server backed by a fixed pool, so each worker thread keeps its own connection."""
+
+    daemon_threads = True
+
+    def __init__(self, address, state: ApiState, workers: int = 16):
+        handler = type("BoundApiHandler", (ApiHandler,), {"state": state})
+        super().__init__(address, handler)
+        self.state = state
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+        self.state.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only JSON API for the Student Grade Tracker")
+    parser.add_argument("--db", default="student_grade_tracker.db", help="database file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=16, help="request threads")
+    args = parser.parse_args()
+
+    server = ApiServer((args.host, args.port), ApiState(args.db), args.workers)
+    print(f"Serving {args.db} on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+from typing import Dict, List
+from database import DatabaseConnection
+
+
+DEFAULT_ARCHIVE_PATH = "student_grade_tracker_archive.db"
+
+
+def archive_students(db: DatabaseConnection, student_ids: List[int] = None, year: int = None,
+                     major: str = None, archive_path: str = DEFAULT_ARCHIVE_PATH) -> Dict[str, int]:
+    """
+    Move the selected students (by id list, year and/or major) and their enrollments into the
+    archive database. The courses they took are copied so the archive keeps its foreign keys.
+
+    The move runs in two transactions, because a transaction spanning an ATTACHed database is
+    not atomic across both files in WAL mode: the copy is committed to the archive first, then
+    the students are deleted from the hot tables (cascading to their enrollments). A crash in
+    between leaves the students in both databases, and archiving them again is harmless.
+
+    Students whose email already belongs to a different archived student are left in place and
+    reported under "email_conflicts". An archived course whose code is now used by a different
+    course id (deleted and recreated) is kept under the code "<code>#<id>".
+    Returns how many students, enrollments and courses were written to the archive.
+    """
+    if student_ids is None and year is None and major is None:
+        raise ValueError("Select students to archive by id list, year or major")
+
+    db.attach_archive(archive_path)
+
+    conditions, params = [], []
+    if year is not None:
+        conditions.append("year = ?")
+        params.append(year)
+    if major is not None:
+        conditions.append("major = ?")
+        params.append(major)
+
+    with db.unit_of_work():
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS archive_request (id INTEGER PRIMARY KEY)")
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (id INTEGER PRIMARY KEY)")
+        db.execute("DELETE FROM temp.archive_request")
+        db.execute("DELETE FROM temp.archive_ids")
+        if student_ids is not None:
+            db.executemany("INSERT OR IGNORE INTO temp.archive_request (id) VALUES (?)",
+                           [(sid,) for sid in student_ids])
+            conditions.append("id IN (SELECT id FROM temp.archive_request)")
+        db.execute(f"""
+            INSERT INTO temp.archive_ids (id)
+            SELECT id FROM main.students
+            WHERE {" AND ".join(conditions)}
+        """, params)
+
+        conflicts = [sid for (sid,) in db.execute("""
+            SELECT s.id FROM main.students s
+            JOIN archive.students a ON a.email = s.email AND a.id != s.id
+            WHERE s.id IN (SELECT id FROM temp.archive_ids)
+            ORDER BY s.id
+        """).fetchall()]
+        db.executemany("DELETE FROM temp.archive_ids WHERE id = ?", [(sid,) for sid in conflicts])
+
+        # Courses are matched on id; an older archived course holding the same code is renamed
+        db.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS archive_courses (id INTEGER PRIMARY KEY)
+        """)
+        db.execute("DELETE FROM temp.archive_courses")
+        db.execute("""
+            INSERT INTO temp.archive_courses (id)
+            SELECT DISTINCT course_id FROM main.enrollments
+            WHERE student_id IN (SELECT id FROM temp.archive_ids)
+        """)
+        db.execute("""
+            UPDATE archive.courses AS a SET course_code = a.course_code || '#' || a.id
+            WHERE a.course_code IN (SELECT course_code FROM main.courses
+                                    WHERE id IN (SELECT id FROM temp.archive_courses))
+              AND NOT EXISTS (SELECT 1 FROM main.courses m
+                              WHERE m.id = a.id AND m.course_code = a.course_code)
+        """)
+        courses = db.execute("""
+            INSERT INTO archive.courses (id, course_code, course_name, credits)
+            SELECT id, course_code, course_name, credits FROM main.courses
+            WHERE id IN (SELECT id FROM temp.archive_courses)
+            ON CONFLICT(id) DO UPDATE SET course_code = excluded.course_code,
+                course_name = excluded.course_name, credits = excluded.credits
+        """).rowcount
+
+        # Upserts on id make re-archiving the same students harmless
+        students = db.execute("""
+            INSERT INTO archive.students (id, name, email, major, year)
+            SELECT id, name, email, major, year FROM main.students
+            WHERE id IN (SELECT id FROM temp.archive_ids)
+            ON CONFLICT(id) DO UPDATE SET name = excluded.name, email = excluded.email,
+                major = excluded.major, year = excluded.year
+        """).rowcount
+        # Archived enrollments the hot tables no longer have (from an interrupted earlier move)
+        db.execute("""
+            DELETE FROM archive.enrollments
+            WHERE student_id IN (SELECT id FROM temp.archive_ids)
+              AND id NOT IN (SELECT id FROM main.enrollments
+                             WHERE student_id IN (SELECT id FROM temp.archive_ids))
+        """)
+        enrollments = db.execute("""
+            INSERT INTO archive.enrollments (id, student_id, course_id, grade)
+            SELECT id, student_id, course_id, grade FROM main.enrollments
+            WHERE student_id IN (SELECT id FROM temp.archive_ids)
+            ON CONFLICT(id) DO UPDATE SET student_id = excluded.student_id,
+                course_id = excluded.course_id, grade = excluded.grade
+        """).rowcount
+
+    # Only after the archive has committed
+    with db.unit_of_work():
+        db.execute("DELETE FROM main.students WHERE id IN (SELECT id FROM temp.archive_ids)")
+        db.execute("DELETE FROM temp.archive_request")
+        db.execute("DELETE FROM temp.archive_ids")
+        db.execute("DELETE FROM temp.archive_courses")
+
+    return {"students": students, "enrollments": enrollments, "courses": courses,
+            "email_conflicts": conflicts}
@@ -0,0 +1,122 @@
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable
+from database import file_signature
+
+
+class ReportCache:
+    """
+    LRU cache for report functions, keyed on the function, its arguments and the database's
+    data_version, so a cached result is only reused while nothing in the database has changed.
+
+    With persist_path set, results are kept there as JSON between runs: call checkpoint(db) while
+    the connection is still open and save() once it is closed. Only results made of lists, tuples
+    and scalars are saved, and they come back with every list turned into a tuple. A loaded entry
+    is only trusted while the database file still has the size and mtime it had when the cache was saved.
+    """
+
+    def __init__(self, max_entries: int = 128, persist_path: str = None):
+        self.max_entries = max_entries
+        self.persist_path = Path(persist_path) if persist_path else None
+        # key -> (data_version token, or None for entries loaded from disk, file signature, result)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._checkpoint_keys = set()
+        self._db_path = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.persist_path and self.persist_path.is_file():
+            self._load()
+
+    def call(self, db, func: Callable, *args):
+        """Return func(db, *args), reusing the cached result if the database is unchanged."""
+        key = (func.__module__, func.__qualname__, args)
+        version = db.data_version()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            token, signature, result = entry
+            fresh = token == version
+            if token is None and not db.in_memory and not db.connection.in_transaction:
+                # Loaded from disk: valid while the file is exactly as it was when the cache was saved
+                fresh = signature == file_signature(db.db_path)
+                if fresh:
+                    self._entries[key] = (version, None, result)
+            if fresh:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+        self.misses += 1
+        result = func(db, *args)
+        self._entries[key] = (version, None, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def checkpoint(self, db):
+        """Remember which entries are still valid for `db` (after its last commit, before it closes)."""
+        if db.in_memory:
+            return
+        version = db.data_version()
+        self._db_path = db.db_path
+        self._checkpoint_keys = {key for key, (token, _, _) in self._entries.items() if token == version}
+
+    def save(self):
+        """Write the entries valid at the last checkpoint(), plus still-unused loaded ones, to persist_path."""
+        if not self.persist_path or self._db_path is None:
+            return
+        signature = file_signature(self._db_path)
+        entries = []
+        for key, (token, loaded_signature, result) in self._entries.items():
+            if key in self._checkpoint_keys:
+                entry = [key, signature, result]
+            elif token is None:
+                entry = [key, loaded_signature, result]
+            else:
+                continue
+            try:
+                entries.append(json.dumps(entry))
+            except (TypeError, ValueError):
+                continue  # not plain data, so it is only cached for this run
+        try:
+            with self.persist_path.open("w", encoding="utf-8") as f:
+                f.write("[" + ",\n".join(entries) + "]")
+        except OSError as e:
+            print(f"Could not save report cache: {e}")
+
+    def _load(self):
+        try:
+            with self.persist_path.open(encoding="utf-8") as f:
+                entries = json.load(f)
+            entries = [(_as_tuples(key), _as_tuples(signature), _as_tuples(result))
+                       for key, signature, result in entries]
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring unreadable report cache: {e}")
+            return
+        for key, signature, result in entries[-self.max_entries:]:
+            self._entries[key] = (None, signature, result)
+
+
+def _as_tuples(value):
+    """JSON has no tuples: turn lists back into (hashable) tuples, recursively."""
+    if isinstance(value, list):
+        return tuple(_as_tuples(v) for v in value)
+    return value
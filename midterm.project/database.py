@@ -1,44 +1,394 @@
+import functools
+import random
+import re
 import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+# Retries per operation name made by retry_on_locked, and the seconds it slept between them (read by stress.py)
+lock_retries = Counter()
+lock_backoff = Counter()
+
+
+def is_locked_error(error: Exception) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED ("database is locked") errors."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, "sqlite_errorcode", None)  # Python 3.11+
+    if code is not None:
+        return code & 0xFF in (5, 6)  # SQLITE_BUSY, SQLITE_LOCKED
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def retry_on_locked(attempts: int = 5, base_delay: float = 0.05, max_delay: float = 2.0):
+    """
+    Decorator for idempotent operations: if SQLite still reports the database as locked after
+    the busy timeout, retry with exponential backoff and full jitter (a random sleep of up to
+    base_delay * 2**attempt, capped at max_delay) so competing processes don't retry in lockstep.
+    Never use it on inserts whose retry could add a row twice.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    return func(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if not is_locked_error(e) or attempt == attempts - 1:
+                        raise
+                    delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+                    lock_retries[func.__qualname__] += 1
+                    lock_backoff[func.__qualname__] += delay
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+class CommitPolicy:
+    """Decides when pending writes get committed.
+
+    Modes:
+        "operation" - commit after every write statement (prompt durability)
+        "rows"      - group commit once `every_rows` rows are pending
+        "interval"  - group commit once `every_seconds` have passed since the last commit
+        "manual"    - only commit when a unit of work ends or commit() is called
+
+    The policy is checked after each statement and by DatabaseConnection.maybe_commit(); there is
+    no background timer, so an "interval" write stays pending while the connection is idle.
+    Interactive loops should call maybe_commit() (or commit()) before waiting for input.
+    """
+
+    MODES = ("operation", "rows", "interval", "manual")
+
+    def __init__(self, mode: str = "operation", every_rows: int = 1000, every_seconds: float = 5.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown commit mode: {mode} (expected one of {', '.join(self.MODES)})")
+        if every_rows <= 0 or every_seconds <= 0:
+            raise ValueError("every_rows and every_seconds must be positive")
+        self.mode = mode
+        self.every_rows = every_rows
+        self.every_seconds = every_seconds
+
+    def should_commit(self, pending_rows: int, seconds_since_commit: float) -> bool:
+        if self.mode == "operation":
+            return True
+        if self.mode == "rows":
+            return pending_rows >= self.every_rows
+        if self.mode == "interval":
+            return seconds_since_commit >= self.every_seconds
+        return False
+
+    def __repr__(self):
+        return f"CommitPolicy({self.mode!r}, every_rows={self.every_rows}, every_seconds={self.every_seconds})"
 
 
 class DatabaseConnection:
-    """Manages SQLite connection with context manager support."""
-    
-    def __init__(self, db_path: str = "student_grade_tracker.db"):
+    """
+    Manages SQLite connection with context manager support.
+
+    With read_only=True the file is opened through a `mode=ro` URI, so any number of
+    processes can read it at once (e.g. parallel report workers) without ever taking a
+    write lock. immutable=True additionally tells SQLite the file cannot change and skips
+    locking entirely - only use it on a copy or snapshot nobody is writing to.
+
+    With in_memory=True the file is loaded into a `:memory:` database through the sqlite3
+    backup API and all work runs in RAM. Changes reach the file through backup_to_disk(),
+    which runs every `backup_interval` seconds (checked on commit) and once more when the block
+    exits cleanly. With persist=False (or db.persist = False later) nothing is written back, for
+    what-if recalculations. A backup replaces the whole file, so if another connection wrote to
+    it since the load (or the last backup) the periodic backup is skipped and the final one goes
+    to "<name>.unsaved<suffix>" instead. `backup_pages` pages are copied per step, and between
+    steps the file is unlocked for `backup_sleep` seconds so other processes can use it; the copy
+    itself runs in the calling thread.
+
+    With archive_path set, an existing archive database (see archive.py) is ATTACHed as
+    `archive`, and student / transcript / GPA lookups fall through to it for ids that are
+    no longer in the hot tables.
+
+    When another process holds the write lock, statements wait up to `busy_timeout` seconds
+    instead of failing with "database is locked". Write transactions start with BEGIN IMMEDIATE
+    (immediate=True), so the lock is taken - and waited for - up front rather than failing
+    halfway through a transaction that already read data.
+    """
+
+    def __init__(self, db_path: str = "student_grade_tracker.db", commit_policy: CommitPolicy = None,
+                 read_only: bool = False, immutable: bool = False, in_memory: bool = False,
+                 backup_interval: float = None, backup_pages: int = 256, backup_sleep: float = 0.005,
+                 archive_path: str = None, busy_timeout: float = 5.0, immediate: bool = True,
+                 persist: bool = True):
+        if in_memory and (read_only or immutable):
+            raise ValueError("in_memory cannot be combined with read_only or immutable")
         self.db_path = Path(db_path)
+        self.read_only = read_only or immutable
+        self.immutable = immutable
+        self.in_memory = in_memory
+        self.backup_interval = backup_interval
+        self.backup_pages = backup_pages
+        self.backup_sleep = backup_sleep
+        self.persist = persist
+        self.backup_count = 0
+        self.last_backup_seconds = 0.0
+        self._last_backup = time.monotonic()
+        self._disk_signature = None  # file_signature(db_path) as of the load or our last backup
+        self._conflict_reported = False
+        self._backed_up_changes = 0  # connection.total_changes at the last backup
+        self._backing_up = False
+        self.archive_path = Path(archive_path) if archive_path else None
+        self.archive_attached = False
+        self.busy_timeout = busy_timeout
+        self.immediate = immediate
         self.connection = None
         self.cursor = None
+        self.commit_policy = commit_policy or CommitPolicy()
+
+        # Commit statistics (see commit_stats())
+        self.commit_count = 0
+        self.commit_seconds = 0.0
+        self.max_commit_seconds = 0.0
+
+        self._pending_rows = 0
+        self._last_commit = time.monotonic()
+        self._unit_depth = 0
 
     def __enter__(self):
         """Context manager entry - opens connection."""
-        self.connection = sqlite3.connect(self.db_path)
+        if self.read_only:
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            if self.immutable:
+                uri += "&immutable=1"
+            self.connection = sqlite3.connect(uri, uri=True, timeout=self.busy_timeout)
+        elif self.in_memory:
+            self.connection = sqlite3.connect(":memory:")
+            if self.db_path.is_file():
+                disk = sqlite3.connect(self.db_path)
+                try:
+                    disk.backup(self.connection)
+                finally:
+                    disk.close()
+            self._disk_signature = file_signature(self.db_path)
+            self._last_backup = time.monotonic()
+        else:
+            self.connection = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                                              isolation_level="IMMEDIATE" if self.immediate else "")
         self.connection.execute("PRAGMA foreign_keys = ON;")
         self.cursor = self.connection.cursor()
+        self._last_commit = time.monotonic()
+        if self.archive_path and self.archive_path.is_file():
+            self.attach_archive()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit - commits and closes."""
+        """Context manager exit - commits whatever is still pending and closes."""
         if exc_type is None:
-            self.connection.commit()
+            self.commit()
+            if not self.read_only and self.connection.total_changes:
+                # Keeps planner statistics fresh after writes; skipped rather than waited for if
+                # another connection holds the write lock
+                self.connection.execute("PRAGMA busy_timeout = 0;")
+                try:
+                    self.connection.execute("PRAGMA optimize;")
+                except sqlite3.OperationalError as e:
+                    if not is_locked_error(e):
+                        raise
         else:
-            self.connection.rollback()
+            self.rollback()
+        if self.in_memory and self.persist and exc_type is None:
+            if self.disk_changed():
+                path = self.db_path.with_name(f"{self.db_path.stem}.unsaved{self.db_path.suffix}")
+                self.backup_to_disk(path=path)
+                print(f"Warning: {self.db_path} was changed by another connection since it was loaded; "
+                      f"the in-memory database was saved to {path} instead.")
+            elif self._disk_signature is None or self.connection.total_changes != self._backed_up_changes:
+                # Skipped when nothing was written since the load or last backup, so the file
+                # (and the signature caches key on) stays untouched; a new file is always written
+                self.backup_to_disk()
         self.cursor.close()
         self.connection.close()
 
     def execute(self, query: str, params=()):
         """Execute query with parameters (safe from SQL injection)."""
         self.cursor.execute(query, params)
+        self._after_statement(self.cursor.rowcount)
         return self.cursor
 
     def executemany(self, query: str, params_list):
         self.cursor.executemany(query, params_list)
+        self._after_statement(self.cursor.rowcount)
         return self.cursor
 
-    def create_tables(self):
-        """Create the database schema if it doesn't exist."""
-        self.execute("""
-            CREATE TABLE IF NOT EXISTS students (
+    def _after_statement(self, rowcount: int):
+        """Apply the commit policy once a statement has left a write transaction open."""
+        if not self.connection.in_transaction:
+            return
+        self._pending_rows += max(rowcount, 0)
+        self.maybe_commit()
+
+    def maybe_commit(self) -> bool:
+        """Commit if the current policy says so (e.g. an interval has passed). Returns True if a commit happened."""
+        if not self.connection.in_transaction:
+            return False
+        elapsed = time.monotonic() - self._last_commit
+        if self.commit_policy.should_commit(self._pending_rows, elapsed):
+            self.commit()
+            return True
+        return False
+
+    def commit(self):
+        """Commit pending writes and record how long the commit took."""
+        if self.connection.in_transaction:
+            start = time.perf_counter()
+            self.connection.commit()
+            elapsed = time.perf_counter() - start
+            self.commit_count += 1
+            self.commit_seconds += elapsed
+            self.max_commit_seconds = max(self.max_commit_seconds, elapsed)
+        self._pending_rows = 0
+        self._last_commit = time.monotonic()
+        if (self.in_memory and self.persist and self.backup_interval is not None and not self._backing_up
+                and self.connection.total_changes != self._backed_up_changes
+                and self._last_commit - self._last_backup >= self.backup_interval):
+            if not self.disk_changed():
+                self.backup_to_disk()
+            elif not self._conflict_reported:
+                print(f"Warning: {self.db_path} was changed by another connection; periodic backups are skipped.")
+                self._conflict_reported = True
+
+    def disk_changed(self) -> bool:
+        """Whether another connection wrote to db_path since it was loaded or last backed up."""
+        return self.in_memory and file_signature(self.db_path) != self._disk_signature
+
+    def backup_to_disk(self, pages: int = None, progress=None, path: str = None, force: bool = False):
+        """
+        Copy the in-memory database to db_path (or `path`), `pages` pages per step (default
+        backup_pages). `progress(status, remaining, total)` is called after each step, as in
+        sqlite3.Connection.backup. Refuses to overwrite db_path after another connection wrote
+        to it, unless force=True.
+        """
+        if not self.in_memory:
+            raise RuntimeError("backup_to_disk() is only available with in_memory=True")
+        target = Path(path) if path else self.db_path
+        if target == self.db_path and not force and self.disk_changed():
+            raise RuntimeError(f"{self.db_path} was changed by another connection since it was loaded; "
+                               "backing up would overwrite those changes (use force=True or another path)")
+        self._backing_up = True  # keeps commit() from starting a periodic backup of its own
+        try:
+            if self.connection.in_transaction:
+                self.commit()  # the file only ever receives committed data
+
+            start = time.perf_counter()
+            disk = sqlite3.connect(target)
+            try:
+                self.connection.backup(disk, pages=pages or self.backup_pages,
+                                       progress=progress, sleep=self.backup_sleep)
+            finally:
+                disk.close()
+        finally:
+            self._backing_up = False
+        self.last_backup_seconds = time.perf_counter() - start
+        self.backup_count += 1
+        if target == self.db_path:
+            self._disk_signature = file_signature(self.db_path)
+            self._backed_up_changes = self.connection.total_changes
+            self._last_backup = time.monotonic()
+
+    def rollback(self):
+        """Discard writes made since the last commit."""
+        self.connection.rollback()
+        self._pending_rows = 0
+
+    def attach(self, alias: str, path: str):
+        """ATTACH another database file under `alias` (tables become alias.students, ...)."""
+        self.connection.execute("ATTACH DATABASE ? AS " + _quote_identifier(alias), (str(path),))
+
+    def detach(self, alias: str):
+        self.connection.execute("DETACH DATABASE " + _quote_identifier(alias))
+
+    def attach_archive(self, path: str = None):
+        """ATTACH the archive database as `archive`, creating its tables if needed."""
+        if self.archive_attached:
+            return
+        if path:
+            self.archive_path = Path(path)
+        if not self.archive_path:
+            raise ValueError("No archive_path configured")
+        self.commit()  # ATTACH is not allowed inside a transaction
+        self.attach("archive", self.archive_path)
+        self.create_tables("archive")
+        self.archive_attached = True
+
+    def enable_wal(self):
+        """Switch the file to WAL journaling so readers never block the writer (persists in the file)."""
+        if not self.read_only:
+            self.execute("PRAGMA journal_mode = WAL;")
+
+    @contextmanager
+    def unit_of_work(self, policy: CommitPolicy = None):
+        """
+        Group writes into one scope: committed when the block ends, rolled back on error.
+        Writes still pending when the outermost scope starts are committed first, so a failing
+        scope only ever rolls back its own work. Inside the scope `policy` replaces the
+        connection's policy; the default is a single transaction, while e.g.
+        CommitPolicy("rows", every_rows=5000) gives bulk loads group commits. Nested scopes join
+        the outermost one: their policy is ignored and they neither commit nor roll back.
+        """
+        outermost = self._unit_depth == 0
+        previous = self.commit_policy
+        if outermost:
+            self.commit()
+            self.commit_policy = policy or CommitPolicy("manual")
+        self._unit_depth += 1
+        try:
+            yield self
+            if outermost:
+                self.commit()
+        except BaseException:
+            if outermost:
+                self.rollback()
+            raise
+        finally:
+            self._unit_depth -= 1
+            self.commit_policy = previous
+
+    @property
+    def unit_depth(self) -> int:
+        """How many unit_of_work scopes are open; above 1 the outermost one owns every commit."""
+        return self._unit_depth
+
+    def data_version(self) -> Tuple:
+        """
+        Token that changes whenever the data seen by this connection may have changed:
+        PRAGMA data_version moves on commits from other connections, total_changes on our own
+        writes (committed or not), and the connection object tells reopened connections apart.
+        """
+        version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        return (id(self.connection), version, self.connection.total_changes)
+
+    def commit_stats(self) -> Dict:
+        """Commit count and latency since the connection was created."""
+        return {
+            "commits": self.commit_count,
+            "total_ms": round(self.commit_seconds * 1000, 3),
+            "avg_ms": round(self.commit_seconds * 1000 / self.commit_count, 3) if self.commit_count else 0.0,
+            "max_ms": round(self.max_commit_seconds * 1000, 3),
+            "pending_rows": self._pending_rows,
+        }
+
+    def create_tables(self, schema: str = "main"):
+        """Create the database schema if it doesn't exist (in an attached database when schema is given)."""
+        schema = _quote_identifier(schema)
+        # Only on a new, empty file: the pragma writes a page on every call, which would change
+        # the file signature and take the write lock at each startup. maintenance.py converts
+        # existing files.
+        if self.execute(f"PRAGMA {schema}.page_count").fetchone()[0] == 0:
+            self.execute(f"PRAGMA {schema}.auto_vacuum = INCREMENTAL;")
+        self.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.students (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
                 email TEXT UNIQUE NOT NULL,
@@ -47,8 +397,8 @@ class DatabaseConnection:
             )
         """)
 
-        self.execute("""
-            CREATE TABLE IF NOT EXISTS courses (
+        self.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.courses (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 course_code TEXT UNIQUE NOT NULL,
                 course_name TEXT NOT NULL,
@@ -56,8 +406,8 @@ class DatabaseConnection:
             )
         """)
 
-        self.execute("""
-            CREATE TABLE IF NOT EXISTS enrollments (
+        self.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.enrollments (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 student_id INTEGER NOT NULL,
                 course_id INTEGER NOT NULL,
@@ -67,3 +417,185 @@ class DatabaseConnection:
                 UNIQUE(student_id, course_id)
             )
         """)
+
+        # One row per interrupted CSV import; see utils._run_import
+        self.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.import_checkpoints (
+                kind TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                file_size INTEGER NOT NULL,
+                file_mtime_ns INTEGER NOT NULL,
+                byte_offset INTEGER NOT NULL,
+                row_number INTEGER NOT NULL,
+                added INTEGER NOT NULL,
+                skipped INTEGER NOT NULL,
+                batches INTEGER NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (kind, filename)
+            )
+        """)
+
+
+def file_signature(db_path) -> Optional[Tuple]:
+    """
+    (size, mtime) of a database file and its non-empty WAL. It changes whenever a commit reaches
+    the file, so it can tell whether the database changed between two runs; None if there is no file.
+    """
+    db_path = Path(db_path)
+    if not db_path.is_file():
+        return None
+    signature = []
+    for path in (db_path, Path(f"{db_path}-wal")):
+        if path.is_file() and path.stat().st_size > 0:
+            stat = path.stat()
+            signature.append((stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+# Each shard hands out ids from its own block, so ids stay unique across the federation
+SHARD_ID_SPAN = 1_000_000_000
+SHARDED_TABLES = ("students", "courses", "enrollments")
+WRITE_KEYWORDS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+# Statements that could change the federated reader itself (or, through it, the attached shards)
+READER_REJECTED = WRITE_KEYWORDS + ("PRAGMA", "ATTACH", "DETACH", "VACUUM", "REINDEX", "ANALYZE")
+_DML_PATTERN = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+class ShardedDatabase:
+    """
+    One database file per shard (e.g. per campus or academic year) behind one connection-like object.
+
+    `shard_map` maps shard name -> file path; its order gives every shard its id block
+    (shard i allocates ids from i * SHARD_ID_SPAN), so only ever append new shards.
+    `router` turns a routing key into a shard name (default: the key is the shard name).
+
+    Reads go to a federated connection that ATTACHes every shard read-only and defines TEMP views
+    students / courses / enrollments as UNION ALL over the shards, so the managers and the
+    report/export helpers fan out across shards unchanged. Writes must be routed:
+
+        with sharded.route("north"):
+            StudentManager(sharded).add_student(student)
+        with sharded.route_id(student_id):
+            StudentManager(sharded).update_student(student)
+
+    SQLite attaches at most 10 databases by default, which caps the number of shards.
+    Every shard keeps its own course catalog; enrollments reference courses in the same shard.
+    """
+
+    def __init__(self, shard_map: Dict[str, str], router: Callable[[Hashable], str] = None,
+                 commit_policy: CommitPolicy = None):
+        if not shard_map:
+            raise ValueError("shard_map must name at least one shard")
+        self.shard_map = dict(shard_map)
+        self.router = router
+        self.commit_policy = commit_policy
+        self.shards: Dict[str, DatabaseConnection] = {}
+        self.reader: Optional[DatabaseConnection] = None
+        self._target: Optional[DatabaseConnection] = None
+
+    def __enter__(self):
+        for index, (name, path) in enumerate(self.shard_map.items()):
+            shard = DatabaseConnection(path, commit_policy=self.commit_policy).__enter__()
+            self.shards[name] = shard
+            shard.create_tables()
+            _reserve_id_block(shard, index)
+            shard.commit()
+
+        self.reader = DatabaseConnection(":memory:").__enter__()
+        for index, path in enumerate(self.shard_map.values()):
+            # mode=ro: even a statement that slips past _check_read cannot write a shard through the reader
+            self.reader.attach(f"shard{index}", f"{Path(path).resolve().as_uri()}?mode=ro")
+        for table in SHARDED_TABLES:
+            union = " UNION ALL ".join(f"SELECT * FROM shard{i}.{table}" for i in range(len(self.shard_map)))
+            self.reader.execute(f"CREATE TEMP VIEW {table} AS {union}")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for shard in self.shards.values():
+            shard.__exit__(exc_type, exc_val, exc_tb)
+        self.reader.__exit__(exc_type, exc_val, exc_tb)
+
+    @property
+    def cursor(self):
+        return self._target.cursor if self._target else self.reader.cursor
+
+    def shard_name(self, key: Hashable) -> str:
+        name = self.router(key) if self.router else key
+        if name not in self.shard_map:
+            raise KeyError(f"No shard named {name!r}")
+        return name
+
+    def shard_for_id(self, row_id: int) -> str:
+        index = row_id // SHARD_ID_SPAN
+        names = list(self.shard_map)
+        if not 0 <= index < len(names):
+            raise KeyError(f"Id {row_id} does not belong to any shard")
+        return names[index]
+
+    def route(self, key: Hashable):
+        """Send every statement inside the block to the shard `key` routes to."""
+        return self._route_to(self.shard_name(key))
+
+    def route_id(self, row_id: int):
+        """Route to the shard that owns a student, course or enrollment id."""
+        return self._route_to(self.shard_for_id(row_id))
+
+    @contextmanager
+    def _route_to(self, name: str):
+        previous = self._target
+        self._target = self.shards[name]
+        try:
+            yield self._target
+        finally:
+            self._target = previous
+
+    def execute(self, query: str, params=()):
+        if self._target is not None:
+            return self._target.execute(query, params)
+        self._check_read(query)
+        return self.reader.execute(query, params)
+
+    def executemany(self, query: str, params_list):
+        if self._target is not None:
+            return self._target.executemany(query, params_list)
+        self._check_read(query)
+        return self.reader.executemany(query, params_list)
+
+    @staticmethod
+    def _check_read(query: str):
+        words = query.split(None, 1)
+        keyword = words[0].upper() if words else ""
+        if keyword in READER_REJECTED or (keyword == "WITH" and _DML_PATTERN.search(query)):
+            raise ValueError("Writes and PRAGMA/ATTACH on a sharded database must be routed: "
+                             "use route(key) or route_id(id)")
+
+    def run_on_shards(self, func: Callable[[str, DatabaseConnection], object],
+                      names: List[str] = None, workers: int = None) -> Dict[str, object]:
+        """
+        Run func(shard_name, db) for each shard in parallel threads, e.g. to bulk-load every
+        shard from its own CSV at once. Each call gets a fresh connection owned by its thread.
+        Returns {shard_name: result}.
+        """
+        names = names or list(self.shard_map)
+
+        def run(name):
+            with DatabaseConnection(self.shard_map[name], commit_policy=self.commit_policy) as db:
+                return func(name, db)
+
+        with ThreadPoolExecutor(max_workers=workers or len(names)) as pool:
+            return dict(zip(names, pool.map(run, names)))
+
+
+def _reserve_id_block(db: DatabaseConnection, index: int):
+    """Start AUTOINCREMENT for every table of shard `index` at the beginning of its id block."""
+    if index == 0:
+        return
+    for table in SHARDED_TABLES:
+        db.execute("""
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)
+        """, (table, index * SHARD_ID_SPAN, table))
@@ -1,7 +1,10 @@
 import sqlite3
-from database import DatabaseConnection
+from archive import archive_students, DEFAULT_ARCHIVE_PATH
+from cache import ReportCache
+from database import DatabaseConnection, CommitPolicy
 from models import Student, Course, Enrollment, StudentManager, CourseManager, EnrollmentManager
-from utils import print_table, export_students_to_csv, export_enrollments_to_csv, export_gpa_report_to_csv, import_students_from_csv, import_enrollments_from_csv
+from reports import run_parallel_reports, generate_transcripts, student_gpa_rows, transcript_data
+from utils import print_table, export_students_to_csv, export_enrollments_to_csv, export_gpa_report_to_csv, import_students_from_csv, import_enrollments_from_csv, validate_students_csv, validate_enrollments_csv
 
 
 def clear_screen():
@@ -27,6 +30,7 @@ def show_student_menu():
     print("2. View all students")
     print("3. Edit student")
     print("4. Delete student")
+    print("5. Archive students")
     print("0. Back")
 
 
@@ -52,6 +56,9 @@ def show_reports_menu():
     print("\n--- Reports ---")
     print("1. View student transcript / GPA")
     print("2. List all students with GPA")
+    print("3. Run end-of-term reports (parallel)")
+    print("4. Generate transcripts for all students")
+    print("5. Report cache statistics")
     print("0. Back")
 
 
@@ -62,6 +69,8 @@ def show_import_export_menu():
     print("3. Export GPA report to CSV")
     print("4. Import students from CSV")
     print("5. Import enrollments from CSV")
+    print("6. Validate students CSV (dry run)")
+    print("7. Validate enrollments CSV (dry run)")
     print("0. Back")
 
 
@@ -70,6 +79,13 @@ def insert_sample_data(db, student_mgr, course_mgr, enroll_mgr):
     if student_mgr.get_all_students():
         return  # Already has data
     
+    with db.unit_of_work():
+        _insert_sample_rows(student_mgr, course_mgr, enroll_mgr)
+    
+    print("Inserted sample data for testing.")
+
+
+def _insert_sample_rows(student_mgr, course_mgr, enroll_mgr):
     # Sample students
     students = [
         Student(name="Mercy Akegbesola", email="akegbesolamercy@myocu.oak.edu", major="Computer Science", year=2),
@@ -101,13 +117,18 @@ def insert_sample_data(db, student_mgr, course_mgr, enroll_mgr):
     ]
     for e in enrollments:
         enroll_mgr.enroll_student(e)
-    
-    print("Inserted sample data for testing.")
+
+
+REPORT_CACHE_NAME = "report_cache.json"
 
 
 def main():
-    with DatabaseConnection() as db:
+    # Interactive edits are committed one by one so a crash never loses more than the current edit
+    with DatabaseConnection(commit_policy=CommitPolicy("operation"), archive_path=DEFAULT_ARCHIVE_PATH) as db:
+        # Reports are reused until the database changes, also across runs (the file lives next to the database)
+        report_cache = ReportCache(persist_path=db.db_path.with_name(REPORT_CACHE_NAME))
         db.create_tables()
+        db.enable_wal()  # lets read-only report workers run while edits continue
         
         student_mgr = StudentManager(db)
         course_mgr = CourseManager(db)
@@ -119,9 +140,12 @@ def main():
             clear_screen()
             show_main_menu()
             
+            # An "interval" commit policy is only checked on activity, so check it before waiting for input
+            db.maybe_commit()
             choice = input("\nEnter choice: ").strip()
             
             if choice == "0":
+                report_cache.checkpoint(db)
                 print("\nThanks for using the Student Grade Tracker. Goodbye!\n")
                 break
                 
@@ -129,6 +153,7 @@ def main():
                 while True:
                     clear_screen()
                     show_student_menu()
+                    db.maybe_commit()
                     sub = input("\nChoice: ").strip()
                     
                     if sub == "0":
@@ -166,7 +191,7 @@ def main():
                             sid = int(input("Student ID to edit: "))
                             student = student_mgr.get_student_by_id(sid)
                             if not student:
-                                print("Student not found.")
+                                print("Student is archived." if student_mgr.is_archived(sid) else "Student not found.")
                                 input("Press Enter to continue...")
                                 continue
                                 
@@ -208,7 +233,7 @@ def main():
                             sid = int(input("Student ID to delete: "))
                             student = student_mgr.get_student_by_id(sid)
                             if not student:
-                                print("Student not found.")
+                                print("Student is archived." if student_mgr.is_archived(sid) else "Student not found.")
                                 input("Press Enter to continue...")
                                 continue
                                 
@@ -226,11 +251,45 @@ def main():
                         except ValueError:
                             print("Invalid ID.")
                         input("Press Enter to continue...")
+                    
+                    elif sub == "5":  # Archive students
+                        try:
+                            ids_str = input("Student IDs to archive, comma-separated (blank to select by year): ").strip()
+                            if ids_str:
+                                ids = [int(x) for x in ids_str.split(",") if x.strip()]
+                                year = None
+                            else:
+                                ids = None
+                                year = int(input("Archive every student in year (1-4): "))
+                        except ValueError:
+                            print("Invalid input.")
+                            input("Press Enter to continue...")
+                            continue
+                        
+                        print(f"\nArchived students move to {DEFAULT_ARCHIVE_PATH} with their enrollments.")
+                        confirm = input("Are you sure? (y/n): ").lower().strip()
+                        if confirm != 'y':
+                            print("Archiving cancelled.")
+                            input("Press Enter to continue...")
+                            continue
+                        
+                        try:
+                            counts = archive_students(db, student_ids=ids, year=year)
+                        except sqlite3.Error as e:
+                            print(f"Archiving failed: {e}")
+                            input("Press Enter to continue...")
+                            continue
+                        print(f"Archived {counts['students']} students and {counts['enrollments']} enrollments.")
+                        if counts["email_conflicts"]:
+                            ids_list = ", ".join(str(sid) for sid in counts["email_conflicts"])
+                            print(f"Not archived (email already used by another archived student): {ids_list}")
+                        input("Press Enter to continue...")
             
             elif choice == "2":  # Manage Courses
                 while True:
                     clear_screen()
                     show_course_menu()
+                    db.maybe_commit()
                     sub = input("\nChoice: ").strip()
                     
                     if sub == "0":
@@ -330,6 +389,7 @@ def main():
                 while True:
                     clear_screen()
                     show_grades_menu()
+                    db.maybe_commit()
                     sub = input("\nChoice: ").strip()
                     
                     if sub == "0":
@@ -342,6 +402,10 @@ def main():
                             
                             student = student_mgr.get_student_by_id(sid)
                             course = course_mgr.get_course_by_id(cid)
+                            if not student and student_mgr.is_archived(sid):
+                                print("Student is archived.")
+                                input("Press Enter to continue...")
+                                continue
                             if not student or not course:
                                 print("Student or course not found.")
                                 input("Press Enter to continue...")
@@ -385,13 +449,13 @@ def main():
                     elif sub == "3":  # View grades
                         try:
                             sid = int(input("Student ID: "))
-                            student = student_mgr.get_student_by_id(sid)
+                            student = student_mgr.get_student_by_id(sid, include_archived=True)
                             if not student:
                                 print("Student not found.")
                                 input("Press Enter to continue...")
                                 continue
                                 
-                            grades = enroll_mgr.get_grades_for_student(sid)
+                            grades = enroll_mgr.get_grades_for_student(sid, include_archived=True)
                             rows = [(code, name, cred, grade if grade else "In Progress") 
                                     for code, name, cred, grade in grades]
                             print_table(["Code", "Course", "Credits", "Grade"], rows, [8, 35, 8, 10])
@@ -406,6 +470,10 @@ def main():
                             
                             student = student_mgr.get_student_by_id(sid)
                             course = course_mgr.get_course_by_id(cid)
+                            if not student and student_mgr.is_archived(sid):
+                                print("Student is archived.")
+                                input("Press Enter to continue...")
+                                continue
                             if not student or not course:
                                 print("Student or course not found.")
                                 input("Press Enter to continue...")
@@ -429,6 +497,7 @@ def main():
                 while True:
                     clear_screen()
                     show_reports_menu()
+                    db.maybe_commit()
                     sub = input("\nChoice: ").strip()
                     
                     if sub == "0":
@@ -437,14 +506,13 @@ def main():
                     elif sub == "1":  # Transcript/GPA
                         try:
                             sid = int(input("Student ID: "))
-                            student = student_mgr.get_student_by_id(sid)
+                            student = student_mgr.get_student_by_id(sid, include_archived=True)
                             if not student:
                                 print("Student not found.")
                                 input("Press Enter to continue...")
                                 continue
                                 
-                            grades = enroll_mgr.get_grades_for_student(sid)
-                            gpa = enroll_mgr.calculate_gpa(sid)
+                            grades, gpa = report_cache.call(db, transcript_data, sid)
                             
                             print(f"\nTranscript for {student.name} ({student.major}, Year {student.year})")
                             print("-"*60)
@@ -461,18 +529,40 @@ def main():
                         input("Press Enter to continue...")
                     
                     elif sub == "2":  # All with GPA
-                        students = student_mgr.get_all_students()
-                        rows = []
-                        for s in students:
-                            gpa = enroll_mgr.calculate_gpa(s.id)
-                            rows.append((s.id, s.name, s.major, gpa if gpa is not None else "N/A"))
+                        rows = report_cache.call(db, student_gpa_rows)
                         print_table(["ID", "Name", "Major", "GPA"], rows)
                         input("Press Enter to continue...")
+                    
+                    elif sub == "3":  # Parallel end-of-term reports
+                        out_dir = input("Output folder (default: reports): ").strip() or "reports"
+                        counts = run_parallel_reports(db.db_path, out_dir)
+                        if counts:
+                            print(f"\nWrote {counts['gpa']} GPA rows, {counts['enrollments']} enrollments "
+                                  f"and {counts['transcripts']} transcript lines to {out_dir}/")
+                        input("Press Enter to continue...")
+                    
+                    elif sub == "4":  # Batch transcripts
+                        out_dir = input("Output folder (default: transcripts): ").strip() or "transcripts"
+                        fmt = input("Format - txt or csv (default: txt): ").strip().lower() or "txt"
+                        if fmt not in ("txt", "csv"):
+                            print("Invalid format.")
+                            input("Press Enter to continue...")
+                            continue
+                        major = input("Only this major (blank for all): ").strip() or None
+                        combined = input("One combined file instead of one per student? (y/n): ").lower().strip() == 'y'
+                        generate_transcripts(db, out_dir, fmt, combined=combined, major=major)
+                        input("Press Enter to continue...")
+                    
+                    elif sub == "5":  # Cache statistics
+                        stats = report_cache.stats()
+                        print_table(["Statistic", "Value"], list(stats.items()))
+                        input("Press Enter to continue...")
             
             elif choice == "5":  # Import/Export
                 while True:
                     clear_screen()
                     show_import_export_menu()
+                    db.maybe_commit()
                     sub = input("\nChoice: ").strip()
                     
                     if sub == "0":
@@ -490,7 +580,7 @@ def main():
                         
                     elif sub == "3":
                         filename = input("Filename (default: gpa_report.csv): ").strip() or "gpa_report.csv"
-                        export_gpa_report_to_csv(db, filename)
+                        export_gpa_report_to_csv(db, filename, report_cache)
                         input("Press Enter to continue...")
                         
                     elif sub == "4":
@@ -510,6 +600,18 @@ def main():
                         else:
                             print("Import cancelled.")
                         input("Press Enter to continue...")
+                    
+                    elif sub == "6":
+                        filename = input("Filename (default: sample_students_import.csv): ").strip() or "sample_students_import.csv"
+                        validate_students_csv(db, filename)
+                        input("Press Enter to continue...")
+                    
+                    elif sub == "7":
+                        filename = input("Filename (default: sample_enrollments_import.csv): ").strip() or "sample_enrollments_import.csv"
+                        validate_enrollments_csv(db, filename)
+                        input("Press Enter to continue...")
+    
+    report_cache.save()  # after closing, so the saved file signature matches the checkpointed file
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+import argparse
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from database import DatabaseConnection
+from utils import print_table
+
+
+def optimize(db, full_analyze: bool = False):
+    """Refresh planner statistics: PRAGMA optimize (cheap, only stale tables) or a full ANALYZE."""
+    db.commit()
+    db.execute("ANALYZE" if full_analyze else "PRAGMA optimize")
+
+
+def enable_incremental_vacuum(db) -> bool:
+    """
+    Switch the file to auto_vacuum=INCREMENTAL. New databases get it from create_tables();
+    an existing file needs one full VACUUM to convert. Returns True if a conversion ran.
+    """
+    if db.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    db.commit()  # VACUUM cannot run inside a transaction
+    db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    db.execute("VACUUM")
+    return True
+
+
+def incremental_vacuum(db, pages: Optional[int] = None) -> int:
+    """Return up to `pages` free pages (all if None) to the filesystem. Returns pages released."""
+    db.commit()
+    before = db.execute("PRAGMA freelist_count").fetchone()[0]
+    query = "PRAGMA incremental_vacuum" if pages is None else f"PRAGMA incremental_vacuum({int(pages)})"
+    # The pragma frees one page per step and execute() only steps statements without result
+    # columns once; executescript() runs it to completion
+    db.connection.executescript(query + ";")
+    return before - db.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def checkpoint_wal(db, mode: str = "TRUNCATE") -> Optional[Tuple[int, int, int]]:
+    """Copy the WAL back into the database file. Returns (busy, wal_pages, checkpointed), None outside WAL mode."""
+    if mode.upper() not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode: {mode}")
+    if db.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+        return None
+    db.commit()
+    return tuple(db.execute(f"PRAGMA wal_checkpoint({mode.upper()})").fetchone())
+
+
+def check_integrity(db) -> Dict[str, List]:
+    """Run integrity_check and foreign_key_check. Empty lists mean the database is healthy."""
+    integrity = [row[0] for row in db.execute("PRAGMA integrity_check").fetchall()]
+    return {
+        "integrity": [] if integrity == ["ok"] else integrity,
+        "foreign_keys": db.execute("PRAGMA foreign_key_check").fetchall(),
+    }
+
+
+def size_stats(db) -> Dict:
+    """
+    File-level page usage plus per-table row counts and per-table/index page counts.
+    Page counts come from the dbstat virtual table and are None when SQLite lacks it.
+    """
+    page_size = db.execute("PRAGMA page_size").fetchone()[0]
+    page_count = db.execute("PRAGMA page_count").fetchone()[0]
+    freelist = db.execute("PRAGMA freelist_count").fetchone()[0]
+
+    pages: Dict[str, Tuple[int, int]] = {}
+    try:
+        for name, count, unused in db.execute(
+                "SELECT name, COUNT(*), SUM(unused) FROM dbstat GROUP BY name").fetchall():
+            pages[name] = (count, unused)
+    except sqlite3.OperationalError:
+        pages = None  # built without SQLITE_ENABLE_DBSTAT_VTAB
+
+    objects = []
+    for name, kind in db.execute("""
+        SELECT name, type FROM sqlite_master
+        WHERE type IN ('table', 'index')
+        ORDER BY tbl_name, type DESC, name
+    """).fetchall():
+        rows = db.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0] if kind == "table" else None
+        count, unused = pages.get(name, (0, 0)) if pages is not None else (None, None)
+        objects.append({
+            "name": name,
+            "type": kind,
+            "rows": rows,
+            "pages": count,
+            # Share of the object's pages that is empty space
+            "unused_pct": round(100 * unused / (count * page_size), 1) if count else None,
+        })
+
+    return {
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist,
+        "file_bytes": page_size * page_count,
+        "free_pct": round(100 * freelist / page_count, 1) if page_count else 0.0,
+        "auto_vacuum": ("none", "full", "incremental")[db.execute("PRAGMA auto_vacuum").fetchone()[0]],
+        "journal_mode": db.execute("PRAGMA journal_mode").fetchone()[0],
+        "objects": objects,
+    }
+
+
+def print_size_stats(stats: Dict):
+    print(f"\n{stats['file_bytes']:,} bytes in {stats['page_count']:,} pages of {stats['page_size']} bytes; "
+          f"{stats['freelist_count']:,} free ({stats['free_pct']}%), "
+          f"auto_vacuum={stats['auto_vacuum']}, journal_mode={stats['journal_mode']}")
+    rows = [(o["name"], o["type"], o["rows"], o["pages"], o["unused_pct"]) for o in stats["objects"]]
+    print_table(["Name", "Type", "Rows", "Pages", "Unused %"], rows)
+
+
+def run_maintenance(db, vacuum_pages: Optional[int] = None, full_analyze: bool = False) -> Dict:
+    """Everything, in order: statistics, incremental vacuum, WAL checkpoint, integrity checks."""
+    optimize(db, full_analyze)
+    converted = enable_incremental_vacuum(db)
+    freed = incremental_vacuum(db, vacuum_pages)
+    checkpoint = checkpoint_wal(db)
+    problems = check_integrity(db)
+    return {"converted": converted, "freed_pages": freed, "checkpoint": checkpoint, **problems}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance for the Student Grade Tracker database")
+    parser.add_argument("command", nargs="?", default="all",
+                        choices=["all", "analyze", "vacuum", "checkpoint", "check", "stats"])
+    parser.add_argument("--db", default="student_grade_tracker.db", help="database file")
+    parser.add_argument("--pages", type=int, default=None, help="pages to free per incremental vacuum (default: all)")
+    parser.add_argument("--full-analyze", action="store_true", help="run ANALYZE instead of PRAGMA optimize")
+    args = parser.parse_args()
+    if not Path(args.db).is_file():
+        # Opening it would silently create an empty database
+        parser.error(f"database file not found: {args.db}")
+
+    with DatabaseConnection(args.db) as db:
+        if args.command in ("all", "stats"):
+            print_size_stats(size_stats(db))
+
+        if args.command == "all":
+            result = run_maintenance(db, args.pages, args.full_analyze)
+            if result["converted"]:
+                print("\nConverted the database to incremental auto-vacuum (full VACUUM).")
+            print(f"\nStatistics refreshed, {result['freed_pages']} free pages released, "
+                  f"WAL checkpoint: {result['checkpoint'] or 'not in WAL mode'}")
+            problems = result
+        elif args.command == "analyze":
+            optimize(db, args.full_analyze)
+            print("Statistics refreshed.")
+        elif args.command == "vacuum":
+            if enable_incremental_vacuum(db):
+                print("Converted the database to incremental auto-vacuum (full VACUUM).")
+            print(f"{incremental_vacuum(db, args.pages)} free pages released.")
+        elif args.command == "checkpoint":
+            print(f"WAL checkpoint: {checkpoint_wal(db) or 'not in WAL mode'}")
+
+        if args.command in ("all", "check"):
+            problems = problems if args.command == "all" else check_integrity(db)
+            if not problems["integrity"] and not problems["foreign_keys"]:
+                print("Integrity and foreign key checks passed.")
+            for line in problems["integrity"]:
+                print(f"Integrity: {line}")
+            for table, rowid, parent, _ in problems["foreign_keys"]:
+                print(f"Foreign key: {table} row {rowid} references a missing {parent} row")
+
+        if args.command == "all":
+            print_size_stats(size_stats(db))
+
+
+if __name__ == "__main__":
+    main()
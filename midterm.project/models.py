@@ -1,5 +1,8 @@
+import json
+import sqlite3
 from dataclasses import dataclass
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
+from database import ShardedDatabase, retry_on_locked
 
 
 class BaseModel:
@@ -53,6 +56,32 @@ class Enrollment(BaseModel):
         return cls(id=row[0], student_id=row[1], course_id=row[2], grade=row[3])
 
 
+def _in_list(column: str, values, conditions: List[str], params: List):
+    """Add `column IN values` with the whole list as one JSON parameter (no temp table, no write)."""
+    conditions.append(f"{column} IN (SELECT value FROM json_each(?))")
+    params.append(json.dumps(list(values)))
+
+
+def _bulk_where(db, conditions: List[str]) -> str:
+    """Join the filters of a bulk operation; rejects unfiltered calls and sharded databases."""
+    if isinstance(db, ShardedDatabase):
+        raise TypeError("Bulk operations need a single DatabaseConnection; "
+                        "run them per shard with ShardedDatabase.run_on_shards()")
+    if not conditions:
+        raise ValueError("Bulk operations need at least one filter")
+    return " AND ".join(conditions)
+
+
+def _bulk_set_clause(changes: Dict, allowed: set):
+    """Validate bulk update columns and return (SET clause, params)."""
+    if not changes:
+        raise ValueError("No changes given")
+    unknown = set(changes) - allowed
+    if unknown:
+        raise ValueError(f"Cannot bulk update: {', '.join(sorted(unknown))} (allowed: {', '.join(sorted(allowed))})")
+    return ", ".join(f"{column} = ?" for column in changes), list(changes.values())
+
+
 class StudentManager:
     """Handles all student-related database operations."""
     
@@ -66,15 +95,33 @@ class StudentManager:
         """, (student.name, student.email, student.major, student.year))
         return cursor.lastrowid
 
+    @retry_on_locked()
     def get_all_students(self) -> List[Student]:
         cursor = self.db.execute("SELECT * FROM students ORDER BY name")
         return [Student.from_row(row) for row in cursor.fetchall()]
 
-    def get_student_by_id(self, student_id: int) -> Optional[Student]:
+    @retry_on_locked()
+    def get_student_by_id(self, student_id: int, include_archived: bool = False) -> Optional[Student]:
+        """Look up a student. Archived students are only returned with include_archived=True,
+        which is meant for read-only paths (transcripts, GPA, the API)."""
         cursor = self.db.execute("SELECT * FROM students WHERE id = ?", (student_id,))
         row = cursor.fetchone()
+        if not row and include_archived and getattr(self.db, "archive_attached", False):
+            # Archived students keep their id, so fall through to the cold database
+            row = self.db.execute("SELECT * FROM archive.students WHERE id = ?", (student_id,)).fetchone()
         return Student.from_row(row) if row else None
 
+    @retry_on_locked()
+    def is_archived(self, student_id: int) -> bool:
+        """True when the id only exists in the attached archive database."""
+        if not getattr(self.db, "archive_attached", False):
+            return False
+        if self.get_student_by_id(student_id):
+            return False
+        row = self.db.execute("SELECT 1 FROM archive.students WHERE id = ?", (student_id,)).fetchone()
+        return row is not None
+
+    @retry_on_locked()
     def update_student(self, student: Student) -> bool:
         if not student.id:
             return False
@@ -85,10 +132,55 @@ class StudentManager:
         """, (student.name, student.email, student.major, student.year, student.id))
         return cursor.rowcount > 0
 
+    @retry_on_locked()
     def delete_student(self, student_id: int) -> bool:
         cursor = self.db.execute("DELETE FROM students WHERE id = ?", (student_id,))
         return cursor.rowcount > 0
 
+    def _student_filter(self, student_ids, major, year) -> Tuple[str, List]:
+        conditions, params = [], []
+        if student_ids is not None:
+            _in_list("id", student_ids, conditions, params)
+        if major is not None:
+            conditions.append("major = ?")
+            params.append(major)
+        if year is not None:
+            conditions.append("year = ?")
+            params.append(year)
+        return _bulk_where(self.db, conditions), params
+
+    @retry_on_locked()
+    def delete_students(self, student_ids: List[int] = None, major: str = None, year: int = None,
+                        dry_run: bool = False) -> Dict[str, int]:
+        """
+        Delete every student matching the id list / major / year in one transaction.
+        Returns the students and cascaded enrollments removed (or that would be, with dry_run).
+        """
+        where, params = self._student_filter(student_ids, major, year)
+        enrollments_query = f"enrollments WHERE student_id IN (SELECT id FROM students WHERE {where})"
+        if dry_run:
+            return {"students": self.db.execute(f"SELECT COUNT(*) FROM students WHERE {where}", params).fetchone()[0],
+                    "enrollments": self.db.execute(f"SELECT COUNT(*) FROM {enrollments_query}", params).fetchone()[0]}
+        with self.db.unit_of_work():
+            # The enrollments would cascade anyway; deleting them first gives their count
+            enrollments = self.db.execute(f"DELETE FROM {enrollments_query}", params).rowcount
+            students = self.db.execute(f"DELETE FROM students WHERE {where}", params).rowcount
+        return {"students": students, "enrollments": enrollments}
+
+    @retry_on_locked()
+    def update_students(self, changes: Dict, student_ids: List[int] = None, major: str = None,
+                        year: int = None, dry_run: bool = False) -> Dict[str, int]:
+        """Set `changes` (major and/or year) on every matching student. Returns the rows affected."""
+        set_clause, set_params = _bulk_set_clause(changes, {"major", "year"})
+        if "year" in changes and not 1 <= changes["year"] <= 4:
+            raise ValueError("Year must be 1–4")
+        where, params = self._student_filter(student_ids, major, year)
+        if dry_run:
+            return {"students": self.db.execute(f"SELECT COUNT(*) FROM students WHERE {where}", params).fetchone()[0]}
+        with self.db.unit_of_work():
+            students = self.db.execute(f"UPDATE students SET {set_clause} WHERE {where}", set_params + params).rowcount
+        return {"students": students}
+
 
 class CourseManager:
     """Handles course-related operations."""
@@ -103,15 +195,18 @@ class CourseManager:
         """, (course.course_code, course.course_name, course.credits))
         return cursor.lastrowid
 
+    @retry_on_locked()
     def get_all_courses(self) -> List[Course]:
         cursor = self.db.execute("SELECT * FROM courses ORDER BY course_code")
         return [Course.from_row(row) for row in cursor.fetchall()]
 
+    @retry_on_locked()
     def get_course_by_id(self, course_id: int) -> Optional[Course]:
         cursor = self.db.execute("SELECT * FROM courses WHERE id = ?", (course_id,))
         row = cursor.fetchone()
         return Course.from_row(row) if row else None
 
+    @retry_on_locked()
     def update_course(self, course: Course) -> bool:
         if not course.id:
             return False
@@ -122,10 +217,51 @@ class CourseManager:
         """, (course.course_code, course.course_name, course.credits, course.id))
         return cursor.rowcount > 0
 
+    @retry_on_locked()
     def delete_course(self, course_id: int) -> bool:
         cursor = self.db.execute("DELETE FROM courses WHERE id = ?", (course_id,))
         return cursor.rowcount > 0
 
+    def _course_filter(self, course_ids, course_codes) -> Tuple[str, List]:
+        conditions, params = [], []
+        if course_ids is not None:
+            _in_list("id", course_ids, conditions, params)
+        if course_codes is not None:
+            _in_list("UPPER(course_code)", [code.upper() for code in course_codes], conditions, params)
+        return _bulk_where(self.db, conditions), params
+
+    @retry_on_locked()
+    def delete_courses(self, course_ids: List[int] = None, course_codes: List[str] = None,
+                       dry_run: bool = False) -> Dict[str, int]:
+        """
+        Delete every course matching the id / course code lists in one transaction.
+        Returns the courses and cascaded enrollments removed (or that would be, with dry_run).
+        """
+        where, params = self._course_filter(course_ids, course_codes)
+        enrollments_query = f"enrollments WHERE course_id IN (SELECT id FROM courses WHERE {where})"
+        if dry_run:
+            return {"courses": self.db.execute(f"SELECT COUNT(*) FROM courses WHERE {where}", params).fetchone()[0],
+                    "enrollments": self.db.execute(f"SELECT COUNT(*) FROM {enrollments_query}", params).fetchone()[0]}
+        with self.db.unit_of_work():
+            # The enrollments would cascade anyway; deleting them first gives their count
+            enrollments = self.db.execute(f"DELETE FROM {enrollments_query}", params).rowcount
+            courses = self.db.execute(f"DELETE FROM courses WHERE {where}", params).rowcount
+        return {"courses": courses, "enrollments": enrollments}
+
+    @retry_on_locked()
+    def update_courses(self, changes: Dict, course_ids: List[int] = None, course_codes: List[str] = None,
+                       dry_run: bool = False) -> Dict[str, int]:
+        """Set `changes` (course_name and/or credits) on every matching course. Returns the rows affected."""
+        set_clause, set_params = _bulk_set_clause(changes, {"course_name", "credits"})
+        if "credits" in changes and changes["credits"] <= 0:
+            raise ValueError("Credits must be positive")
+        where, params = self._course_filter(course_ids, course_codes)
+        if dry_run:
+            return {"courses": self.db.execute(f"SELECT COUNT(*) FROM courses WHERE {where}", params).fetchone()[0]}
+        with self.db.unit_of_work():
+            courses = self.db.execute(f"UPDATE courses SET {set_clause} WHERE {where}", set_params + params).rowcount
+        return {"courses": courses}
+
 
 class EnrollmentManager:
     """Handles grade recording and GPA calculations."""
@@ -143,6 +279,7 @@ class EnrollmentManager:
         except sqlite3.IntegrityError:
             return False  # already enrolled
 
+    @retry_on_locked()
     def update_grade(self, student_id: int, course_id: int, grade: float) -> bool:
         cursor = self.db.execute("""
             UPDATE enrollments
@@ -151,6 +288,7 @@ class EnrollmentManager:
         """, (grade, student_id, course_id))
         return cursor.rowcount > 0
 
+    @retry_on_locked()
     def delete_enrollment(self, student_id: int, course_id: int) -> bool:
         cursor = self.db.execute("""
             DELETE FROM enrollments
@@ -158,23 +296,67 @@ class EnrollmentManager:
         """, (student_id, course_id))
         return cursor.rowcount > 0
 
-    def get_grades_for_student(self, student_id: int):
+    def _enrollment_filter(self, student_ids, course_ids, major, year) -> Tuple[str, List]:
+        conditions, params = [], []
+        if student_ids is not None:
+            _in_list("student_id", student_ids, conditions, params)
+        if course_ids is not None:
+            _in_list("course_id", course_ids, conditions, params)
+        if major is not None or year is not None:
+            student_filter = " AND ".join(f"{column} = ?" for column, value in (("major", major), ("year", year))
+                                          if value is not None)
+            conditions.append(f"student_id IN (SELECT id FROM students WHERE {student_filter})")
+            params.extend(value for value in (major, year) if value is not None)
+        return _bulk_where(self.db, conditions), params
+
+    @retry_on_locked()
+    def delete_enrollments(self, student_ids: List[int] = None, course_ids: List[int] = None,
+                           major: str = None, year: int = None, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Remove every enrollment matching the student / course id lists and the students' major / year,
+        e.g. course_ids=[cancelled_section] drops a cancelled section. Returns the rows affected.
+        """
+        where, params = self._enrollment_filter(student_ids, course_ids, major, year)
+        if dry_run:
+            return {"enrollments": self.db.execute(f"SELECT COUNT(*) FROM enrollments WHERE {where}", params).fetchone()[0]}
+        with self.db.unit_of_work():
+            enrollments = self.db.execute(f"DELETE FROM enrollments WHERE {where}", params).rowcount
+        return {"enrollments": enrollments}
+
+    @retry_on_locked()
+    def update_grades(self, grade: Optional[float], student_ids: List[int] = None, course_ids: List[int] = None,
+                      major: str = None, year: int = None, dry_run: bool = False) -> Dict[str, int]:
+        """Set the same grade (or None for in progress) on every matching enrollment. Returns the rows affected."""
+        if grade is not None and not 0 <= grade <= 4.0:
+            raise ValueError("Grade must be 0.0–4.0")
+        where, params = self._enrollment_filter(student_ids, course_ids, major, year)
+        if dry_run:
+            return {"enrollments": self.db.execute(f"SELECT COUNT(*) FROM enrollments WHERE {where}", params).fetchone()[0]}
+        with self.db.unit_of_work():
+            enrollments = self.db.execute(f"UPDATE enrollments SET grade = ? WHERE {where}", [grade] + params).rowcount
+        return {"enrollments": enrollments}
+
+    @retry_on_locked()
+    def get_grades_for_student(self, student_id: int, include_archived: bool = False):
         query = """
             SELECT 
                 c.course_code, 
                 c.course_name, 
                 c.credits,
                 e.grade
-            FROM enrollments e
-            JOIN courses c ON e.course_id = c.id
+            FROM {schema}enrollments e
+            JOIN {schema}courses c ON e.course_id = c.id
             WHERE e.student_id = ?
             ORDER BY c.course_code
         """
-        cursor = self.db.execute(query, (student_id,))
-        return cursor.fetchall()
-
-    def calculate_gpa(self, student_id: int) -> Optional[float]:
-        grades = self.get_grades_for_student(student_id)
+        cursor = self.db.execute(query.format(schema=""), (student_id,))
+        rows = cursor.fetchall()
+        if not rows and include_archived and getattr(self.db, "archive_attached", False):
+            rows = self.db.execute(query.format(schema="archive."), (student_id,)).fetchall()
+        return rows
+
+    def calculate_gpa(self, student_id: int, include_archived: bool = False) -> Optional[float]:
+        grades = self.get_grades_for_student(student_id, include_archived)
         if not grades:
             return None
             
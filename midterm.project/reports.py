@@ -0,0 +1,265 @@
+import csv
+import heapq
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from database import DatabaseConnection
+from models import StudentManager, EnrollmentManager
+from utils import export_to_csv
+
+
+GPA_HEADERS = ["id", "name", "email", "major", "year", "gpa", "total_credits", "graded_courses"]
+ENROLLMENT_HEADERS = ["student_id", "student_name", "course_id", "course_code", "course_name", "grade"]
+TRANSCRIPT_HEADERS = ["student_id", "student_name", "major", "year",
+                      "course_code", "course_name", "credits", "grade", "gpa"]
+
+
+def gpa_from_grades(grades) -> Optional[float]:
+    """Same arithmetic as EnrollmentManager.calculate_gpa, on (code, name, credits, grade) rows."""
+    if not grades:
+        return None
+
+    total_points = 0.0
+    total_credits = 0
+
+    for _, _, credits, grade in grades:
+        if grade is not None:
+            total_points += grade * credits
+            total_credits += credits
+
+    return round(total_points / total_credits, 3) if total_credits > 0 else 0.0
+
+
+def student_gpa_rows(db) -> List[Tuple]:
+    """(id, name, major, gpa) for every student, as listed by Reports > List all students with GPA."""
+    enroll_mgr = EnrollmentManager(db)
+    rows = []
+    for s in StudentManager(db).get_all_students():
+        gpa = enroll_mgr.calculate_gpa(s.id)
+        rows.append((s.id, s.name, s.major, gpa if gpa is not None else "N/A"))
+    return rows
+
+
+def transcript_data(db, student_id: int) -> Tuple[List[Tuple], Optional[float]]:
+    """(grades, gpa) behind the transcript screen; archived students are included."""
+    enroll_mgr = EnrollmentManager(db)
+    return (enroll_mgr.get_grades_for_student(student_id, include_archived=True),
+            enroll_mgr.calculate_gpa(student_id, include_archived=True))
+
+
+def student_id_ranges(db, parts: int) -> List[Tuple[int, int]]:
+    """Split the student IDs into up to `parts` contiguous ranges holding roughly equal row counts."""
+    total = db.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+    if total == 0:
+        return []
+
+    parts = max(1, min(parts, total))
+    bounds = []
+    for i in range(parts):
+        offset = i * total // parts
+        bounds.append(db.execute("SELECT id FROM students ORDER BY id LIMIT 1 OFFSET ?",
+                                 (offset,)).fetchone()[0])
+    last_id = db.execute("SELECT MAX(id) FROM students").fetchone()[0]
+
+    ranges = []
+    for i, low in enumerate(bounds):
+        high = bounds[i + 1] - 1 if i + 1 < len(bounds) else last_id
+        ranges.append((low, high))
+    return ranges
+
+
+def iter_student_courses(db, where: str = "", params=()):
+    """
+    Stream ((id, name, email, major, year), grades) per student from one ordered JOIN,
+    where grades are (course_id, course_code, course_name, credits, grade) rows by course code.
+    `where` is an optional SQL condition on the students table (alias s).
+    """
+    query = f"""
+        SELECT
+            s.id, s.name, s.email, s.major, s.year,
+            c.id, c.course_code, c.course_name, c.credits,
+            e.grade
+        FROM students s
+        LEFT JOIN enrollments e ON e.student_id = s.id
+        LEFT JOIN courses c ON e.course_id = c.id
+        {"WHERE " + where if where else ""}
+        ORDER BY s.id, c.course_code
+    """
+    cursor = db.execute(query, params)
+    for student, rows in groupby(cursor, key=lambda r: r[:5]):
+        # A student with no courses still yields one LEFT JOIN row with NULL course columns
+        yield student, [r[5:] for r in rows if r[5] is not None]
+
+
+def _report_chunk(db_path: str, low: int, high: int) -> Dict[str, List[Tuple]]:
+    """
+    Build every report row for students with low <= id <= high.
+    Runs in a worker process on its own read-only connection, using one JOIN for the whole range.
+    """
+    gpa_rows = []
+    enrollment_rows = []
+    transcript_rows = []
+
+    with DatabaseConnection(db_path, read_only=True) as db:
+        for (sid, name, email, major, year), rows in iter_student_courses(db, "s.id BETWEEN ? AND ?",
+                                                                          (low, high)):
+            grades = [(r[1], r[2], r[3], r[4]) for r in rows]
+            gpa = gpa_from_grades(grades)
+            total_credits = sum(c for _, _, c, g in grades if g is not None)
+            graded_courses = len([g for g in grades if g[3] is not None])
+
+            gpa_rows.append((sid, name, email, major, year, gpa if gpa else "N/A", total_credits, graded_courses))
+            for r in rows:
+                enrollment_rows.append((sid, name, r[0], r[1], r[2], r[4]))
+                transcript_rows.append((sid, name, major, year, r[1], r[2], r[3], r[4],
+                                        gpa if gpa is not None else "N/A"))
+
+    # Match the single-threaded exports: students by name, enrollments by name then course code
+    gpa_rows.sort(key=lambda r: (r[1], r[0]))
+    enrollment_rows.sort(key=lambda r: (r[1], r[0], r[3]))
+    transcript_rows.sort(key=lambda r: (r[1], r[0], r[4]))
+    return {"gpa": gpa_rows, "enrollments": enrollment_rows, "transcripts": transcript_rows}
+
+
+def run_parallel_reports(db_path: str, out_dir: str = ".", workers: Optional[int] = None) -> Dict[str, int]:
+    """
+    End-of-term reporting: GPA report, enrollment export and transcripts for every student.
+
+    Student IDs are split into ranges, each range is reported by a worker process over a
+    read-only connection (so writers are not blocked), and the sorted partial results are
+    merged back into one ordered CSV per report. Returns the row count of each report.
+    """
+    workers = workers or os.cpu_count() or 1
+    with DatabaseConnection(db_path, read_only=True) as db:
+        ranges = student_id_ranges(db, workers * 4)
+
+    if not ranges:
+        print("No students to report on.")
+        return {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = list(pool.map(_report_chunk, [str(db_path)] * len(ranges),
+                               [r[0] for r in ranges], [r[1] for r in ranges]))
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    reports = [
+        ("gpa", "gpa_report.csv", GPA_HEADERS, lambda r: (r[1], r[0])),
+        ("enrollments", "enrollments_export.csv", ENROLLMENT_HEADERS, lambda r: (r[1], r[0], r[3])),
+        ("transcripts", "transcripts.csv", TRANSCRIPT_HEADERS, lambda r: (r[1], r[0], r[4])),
+    ]
+    counts = {}
+    for name, filename, headers, key in reports:
+        rows = list(heapq.merge(*(chunk[name] for chunk in chunks), key=key))
+        export_to_csv(str(out / filename), headers, rows)
+        counts[name] = len(rows)
+    return counts
+
+
+def format_transcript(student: Tuple, grades: List[Tuple], gpa: Optional[float]) -> str:
+    """Plain-text transcript laid out like the Reports > transcript screen."""
+    _, name, _, major, year = student
+    widths = [8, 35, 8, 10]
+    lines = [f"Transcript for {name} ({major}, Year {year})", "-" * 60]
+    if grades:
+        lines.append("  ".join(h.ljust(w) for h, w in zip(["Code", "Course", "Credits", "Grade"], widths)))
+        lines.append("-" * (sum(widths) + 2 * (len(widths) - 1)))
+        for code, course, credits, grade in grades:
+            values = (code, course, credits, grade if grade else "In Progress")
+            lines.append("  ".join(str(v).ljust(w) for v, w in zip(values, widths)))
+    else:
+        lines.append("No records found.")
+    lines.append("")
+    lines.append(f"Current GPA: {gpa:.3f}" if gpa is not None else "No graded courses yet.")
+    return "\n".join(lines) + "\n"
+
+
+def _transcript_csv_rows(student: Tuple, grades: List[Tuple], gpa: Optional[float]) -> List[Tuple]:
+    sid, name, _, major, year = student
+    return [(sid, name, major, year, code, course, credits, grade, gpa if gpa is not None else "N/A")
+            for code, course, credits, grade in grades]
+
+
+def _write_transcript_file(path: Path, fmt: str, student: Tuple, grades: List[Tuple], gpa: Optional[float]):
+    if fmt == "csv":
+        with path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(TRANSCRIPT_HEADERS)
+            writer.writerows(_transcript_csv_rows(student, grades, gpa))
+    else:
+        path.write_text(format_transcript(student, grades, gpa), encoding="utf-8")
+
+
+def generate_transcripts(db, out_dir: str = "transcripts", fmt: str = "txt", combined: bool = False,
+                         student_ids: List[int] = None, major: str = None, year: int = None,
+                         workers: int = 4) -> int:
+    """
+    Batch transcripts for every student, or only those matching student_ids / major / year.
+
+    Everything comes from one ordered JOIN grouped by student, with the GPA computed on the fly.
+    With combined=True all transcripts go into one file (transcripts.txt / transcripts.csv);
+    otherwise each student gets transcript_<id>.<fmt>, written by a bounded thread pool.
+    Returns the number of transcripts written.
+    """
+    if fmt not in ("txt", "csv"):
+        raise ValueError("fmt must be 'txt' or 'csv'")
+
+    conditions, params = [], []
+    if student_ids is not None:
+        conditions.append("s.id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(student_ids)))
+    if major:
+        conditions.append("s.major = ?")
+        params.append(major)
+    if year is not None:
+        conditions.append("s.year = ?")
+        params.append(year)
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    written = 0
+
+    def transcripts():
+        for student, rows in iter_student_courses(db, " AND ".join(conditions), params):
+            grades = [r[1:] for r in rows]
+            yield student, grades, gpa_from_grades(grades)
+
+    if combined:
+        path = out / f"transcripts.{fmt}"
+        with path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f) if fmt == "csv" else None
+            if writer:
+                writer.writerow(TRANSCRIPT_HEADERS)
+            for student, grades, gpa in transcripts():
+                if writer:
+                    writer.writerows(_transcript_csv_rows(student, grades, gpa))
+                else:
+                    f.write(format_transcript(student, grades, gpa) + "\n")
+                written += 1
+        print(f"Wrote {written} transcripts to {path}")
+        return written
+
+    # Bound the number of queued files so a huge term doesn't buffer every transcript in memory
+    slots = threading.BoundedSemaphore(workers * 4)
+
+    def write(path, student, grades, gpa):
+        try:
+            _write_transcript_file(path, fmt, student, grades, gpa)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for student, grades, gpa in transcripts():
+            slots.acquire()
+            futures.append(pool.submit(write, out / f"transcript_{student[0]}.{fmt}", student, grades, gpa))
+            written += 1
+        for future in futures:
+            future.result()  # re-raise any write error
+
+    print(f"Wrote {written} transcripts to {out}/")
+    return written
@@ -0,0 +1,497 @@
+import argparse
+import array
+import hashlib
+import json
+import math
+import mmap
+import os
+import sys
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from database import DatabaseConnection, file_signature
+from utils import print_table
+
+try:
+    import numpy as np
+except ImportError:  # optional: the same files are read through typed memoryviews instead
+    np = None
+
+
+# Column -> array typecode. Each column is one file of native-endian fixed-width values.
+COLUMNS = {"id": "q", "student_id": "q", "course_id": "q", "credits": "i", "grade": "d"}
+BLOCK_SIZE = 4096  # enrollment ids covered by one fingerprint
+FORMAT_VERSION = 2
+FETCH_ROWS = 50_000
+MAX_ROWID = 2 ** 63 - 1
+DEFAULT_SNAPSHOT_PATH = "enrollments_snapshot"
+
+_ROWS_QUERY = """
+    SELECT e.id, e.student_id, e.course_id, COALESCE(c.credits, 0), e.grade
+    FROM enrollments e
+    LEFT JOIN courses c ON c.id = e.course_id
+    WHERE e.id BETWEEN ? AND ?
+    ORDER BY e.id
+"""
+
+# Per block of ids: row count and a hash over every row (see _BlockHash)
+_FINGERPRINT_QUERY = """
+    SELECT e.id / :block, COUNT(*), snapshot_block_hash(e.id, e.student_id, e.course_id, e.grade)
+    FROM enrollments e
+    WHERE e.id <= :max_id
+    GROUP BY e.id / :block
+"""
+
+
+_HASH_MASK = 2 ** 64 - 1
+
+
+def _row_hash(*values) -> int:
+    """64-bit BLAKE2b hash of (id, student_id, course_id, grade) as SQLite returns them."""
+    return int.from_bytes(hashlib.blake2b(repr(values).encode(), digest_size=8).digest(), "little")
+
+
+class _BlockHash:
+    """
+    SQLite aggregate: the sum mod 2**64 of the rows' _row_hash, as 16 hex digits (SQLite integers
+    are signed). Any change to a row changes its hash unpredictably, so edits cannot cancel out
+    the way plain sums can; the sum does not depend on row order, and rows appended to a block
+    can be added to its stored hash.
+    """
+
+    def __init__(self):
+        self.total = 0
+
+    def step(self, *values):
+        self.total = (self.total + _row_hash(*values)) & _HASH_MASK
+
+    def finalize(self):
+        return f"{self.total:016x}"
+
+
+def _add_to_blocks(blocks: Dict[int, List], added: Dict[int, Tuple[int, int]]):
+    """Add (row count, hash sum) per block to `blocks` ({block: [count, hex hash]}) in place."""
+    for block, (count, total) in added.items():
+        old_count, old_hash = blocks.get(block, (0, "0"))
+        blocks[block] = [old_count + count, f"{(int(old_hash, 16) + total) & _HASH_MASK:016x}"]
+
+
+def _itemsize(name: str) -> int:
+    return array.array(COLUMNS[name]).itemsize
+
+
+def _fingerprints(conn, max_id: int) -> Dict[int, List]:
+    conn.create_aggregate("snapshot_block_hash", 4, _BlockHash)
+    rows = conn.execute(_FINGERPRINT_QUERY, {"block": BLOCK_SIZE, "max_id": max_id})
+    return {block: list(fp) for block, *fp in rows}
+
+
+class EnrollmentSnapshot:
+    """
+    Columnar copy of enrollments JOIN courses for analytics: one file per column (id, student_id,
+    course_id, credits, and grade with NaN for in-progress) plus meta.json, in the `path` directory.
+
+    columns() maps the files read-only (numpy.memmap when numpy is installed, typed memoryviews
+    over mmap otherwise), so repeated analytics skip SQLite decoding entirely and the data lives
+    in the OS page cache instead of as Python objects.
+
+    refresh(db) updates the files incrementally: enrollments above the snapshot's highest id are
+    appended, per-block row hashes find rows that changed, which are rewritten in place,
+    and a changed course credit value is patched into the credits column. Deletes shift every
+    later row, so they trigger a full rebuild.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        self.path = Path(path)
+        self.meta = self._read_meta()
+        self._maps = []
+        self._views = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def rows(self) -> int:
+        return self.meta["rows"] if self.meta else 0
+
+    def _file(self, name: str) -> Path:
+        return self.path / f"{name}.bin"
+
+    def _read_meta(self) -> Optional[Dict]:
+        try:
+            return json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta: Dict):
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self.path / "meta.json")
+        self.meta = meta
+
+    def _usable(self, db) -> bool:
+        """Whether the files on disk belong to `db` and are complete, so they can be updated in place."""
+        meta = self.meta
+        if (not meta or meta.get("version") != FORMAT_VERSION or meta["byteorder"] != sys.byteorder
+                or meta["block_size"] != BLOCK_SIZE or meta["db_path"] != str(db.db_path.resolve())):
+            return False
+        # Files longer than meta.json says are left over from an interrupted append
+        return all(self._file(name).is_file() and self._file(name).stat().st_size == meta["rows"] * _itemsize(name)
+                   for name in COLUMNS)
+
+    def refresh(self, db) -> Dict:
+        """
+        Bring the snapshot up to date with `db`. Returns {"action": "unchanged" | "updated" |
+        "rebuilt", "appended": rows, "patched": rows, "rows": total rows}.
+        """
+        own_writes = db.connection.in_transaction
+        # Taken before reading, so a commit that lands meanwhile makes the next refresh look again
+        signature = None if own_writes or db.in_memory else file_signature(db.db_path)
+        signature = [list(part) for part in signature] if signature else None  # as stored in meta.json
+        if signature is not None and self._usable(db) and self.meta["signature"] == signature:
+            return {"action": "unchanged", "appended": 0, "patched": 0, "rows": self.rows}
+
+        self.close()
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Queries go through the raw connection: db.execute() would apply the commit policy and
+        # end the read transaction that keeps every query below on the same database state
+        conn = db.connection
+        if not own_writes:
+            conn.execute("BEGIN")
+        try:
+            result = self._update(db, conn) if self._usable(db) else None
+            if result is None:
+                result = self._rebuild(db, conn)
+            self.meta["signature"] = signature
+            self._write_meta(self.meta)
+        finally:
+            if not own_writes:
+                conn.rollback()  # only read
+        result["rows"] = self.rows
+        return result
+
+    def _rebuild(self, db, conn) -> Dict:
+        tmp = {name: self.path / f"{name}.bin.tmp" for name in COLUMNS}
+        files = {name: path.open("wb") for name, path in tmp.items()}
+        blocks = {}
+        try:
+            rows, max_id = self._write_rows(files, conn.execute(_ROWS_QUERY, (0, MAX_ROWID)), blocks)
+        finally:
+            for f in files.values():
+                f.close()
+        for name, path in tmp.items():
+            os.replace(path, self._file(name))  # readers still mapping the old files keep their data
+
+        self.meta = {
+            "version": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "block_size": BLOCK_SIZE,
+            "db_path": str(db.db_path.resolve()),
+            "rows": rows,
+            "max_id": max_id,
+            "blocks": blocks,
+            "credits": dict(conn.execute("SELECT id, credits FROM courses")),
+        }
+        return {"action": "rebuilt", "appended": rows, "patched": 0}
+
+    def _update(self, db, conn) -> Optional[Dict]:
+        """Patch changed rows in place and append new ones; None if a rebuild is needed instead."""
+        meta = self.meta
+        stored = {int(block): fp for block, fp in meta["blocks"].items()}
+        current = _fingerprints(conn, meta["max_id"])
+        if current.keys() != stored.keys() or any(current[b][0] != stored[b][0] for b in current):
+            return None  # rows were deleted, so the offsets of later rows have moved
+
+        patched = 0
+        files = {name: self._file(name).open("r+b") for name in COLUMNS}
+        try:
+            offset = 0
+            for block in sorted(current):
+                count = current[block][0]
+                if current[block] != stored[block]:
+                    low = block * BLOCK_SIZE
+                    high = min(low + BLOCK_SIZE - 1, meta["max_id"])
+                    for name, f in files.items():
+                        f.seek(offset * _itemsize(name))
+                    patched += self._write_rows(files, conn.execute(_ROWS_QUERY, (low, high)))[0]
+                offset += count
+
+            credits = {int(cid): value for cid, value in conn.execute("SELECT id, credits FROM courses")}
+            old_credits = {int(cid): value for cid, value in meta["credits"].items()}
+            changed = {cid: value for cid, value in credits.items() if old_credits.get(cid, value) != value}
+            if changed:
+                patched += self._patch_credits(files["course_id"], files["credits"], changed, meta["rows"])
+
+            for name, f in files.items():
+                f.seek(0, os.SEEK_END)
+            # Patched blocks now match `current`; appended rows are added to it
+            appended, max_id = self._write_rows(files, conn.execute(_ROWS_QUERY, (meta["max_id"] + 1, MAX_ROWID)),
+                                                current)
+        finally:
+            for f in files.values():
+                f.close()
+
+        if appended:
+            meta["rows"] += appended
+            meta["max_id"] = max_id
+        meta["blocks"] = current
+        meta["credits"] = credits
+        return {"action": "updated" if patched or appended else "unchanged", "appended": appended, "patched": patched}
+
+    @staticmethod
+    def _write_rows(files, cursor, blocks: Dict[int, List] = None) -> Tuple[int, int]:
+        """
+        Write cursor rows at each file's current position, adding them to the block fingerprints
+        in `blocks` if given. Returns (rows written, last id).
+        """
+        written, last_id = 0, 0
+        added = {}
+        while True:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                if blocks is not None:
+                    _add_to_blocks(blocks, added)
+                return written, last_id
+            if blocks is not None:
+                for row_id, student_id, course_id, _, grade in rows:
+                    count, total = added.get(row_id // BLOCK_SIZE, (0, 0))
+                    added[row_id // BLOCK_SIZE] = (count + 1, (total + _row_hash(row_id, student_id, course_id, grade))
+                                                   & _HASH_MASK)
+            ids, students, courses, credits, grades = zip(*rows)
+            values = {"id": ids, "student_id": students, "course_id": courses, "credits": credits,
+                      "grade": [math.nan if g is None else g for g in grades]}
+            for name, f in files.items():
+                f.write(array.array(COLUMNS[name], values[name]).tobytes())
+            written += len(rows)
+            last_id = ids[-1]
+
+    @staticmethod
+    def _patch_credits(course_file, credits_file, changed: Dict[int, int], rows: int) -> int:
+        """Set credits for every existing row of the courses in `changed`. Returns rows patched."""
+        if not rows:
+            return 0
+        course_file.flush()  # rows patched above may still sit in the file buffers
+        credits_file.flush()
+        course_map = mmap.mmap(course_file.fileno(), 0, access=mmap.ACCESS_READ)
+        credits_map = mmap.mmap(credits_file.fileno(), 0)
+        course_ids = memoryview(course_map).cast(COLUMNS["course_id"])
+        credits = memoryview(credits_map).cast(COLUMNS["credits"])
+        patched = 0
+        try:
+            for i, cid in enumerate(course_ids):
+                if cid in changed:
+                    credits[i] = changed[cid]
+                    patched += 1
+            credits_map.flush()
+        finally:
+            course_ids.release()
+            credits.release()
+            course_map.close()
+            credits_map.close()
+        return patched
+
+    def verify(self, db) -> List[int]:
+        """
+        Compare every snapshot row with the database, without refreshing. Returns the ids of rows
+        that differ, are missing or no longer exist; empty when the snapshot is current.
+        """
+        cols = self.columns()
+        snapshot_rows = zip(*(cols[name] for name in COLUMNS))
+        mismatched = []
+        try:
+            db_rows = iter(db.execute(_ROWS_QUERY, (0, MAX_ROWID)))
+            ours, theirs = next(snapshot_rows, None), next(db_rows, None)
+            while ours is not None or theirs is not None:
+                if theirs is None or (ours is not None and ours[0] < theirs[0]):
+                    mismatched.append(int(ours[0]))  # deleted from the database
+                    ours = next(snapshot_rows, None)
+                elif ours is None or theirs[0] < ours[0]:
+                    mismatched.append(theirs[0])  # not in the snapshot yet
+                    theirs = next(db_rows, None)
+                else:
+                    grade = math.nan if theirs[4] is None else theirs[4]
+                    if tuple(ours[:4]) != theirs[:4] or not (ours[4] == grade or ours[4] != ours[4] and grade != grade):
+                        mismatched.append(theirs[0])
+                    ours, theirs = next(snapshot_rows, None), next(db_rows, None)
+        finally:
+            del cols, snapshot_rows
+            self.close()
+        return mismatched
+
+    def columns(self) -> Dict[str, Sequence]:
+        """
+        Map every column read-only without copying. The arrays stay valid until close() or the
+        next refresh() of this object; call columns() again after a refresh to see new rows.
+        """
+        if not self.meta:
+            raise ValueError(f"No snapshot in {self.path}; run refresh() first")
+        rows = self.meta["rows"]
+        result = {}
+        for name, code in COLUMNS.items():
+            if np is not None:
+                result[name] = (np.memmap(self._file(name), dtype=np.dtype(code), mode="r", shape=(rows,))
+                                if rows else np.empty(0, dtype=np.dtype(code)))
+            elif rows:
+                with self._file(name).open("rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                sliced = memoryview(mapped)[:rows * _itemsize(name)]
+                result[name] = sliced.cast(code)
+                self._maps.append(mapped)
+                self._views += [result[name], sliced]
+            else:
+                result[name] = array.array(code)
+        return result
+
+    def close(self):
+        """Unmap the memoryviews handed out by columns() (numpy arrays unmap themselves)."""
+        for view in self._views:
+            view.release()
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # the caller still holds a slice of it; unmapped when that is collected
+        self._views, self._maps = [], []
+
+
+def _is_numpy(cols) -> bool:
+    return np is not None and isinstance(cols["grade"], np.ndarray)
+
+
+def gpa_by_student(cols) -> Dict[int, float]:
+    """
+    GPA per enrolled student with calculate_gpa's arithmetic (0.0 while nothing is graded).
+    Grades are summed in enrollment order rather than by course code, so a result can differ
+    from calculate_gpa in the last rounded digit.
+    """
+    if _is_numpy(cols):
+        grade = cols["grade"]
+        graded = ~np.isnan(grade)
+        ids, inverse = np.unique(cols["student_id"], return_inverse=True)
+        weight = np.where(graded, cols["credits"], 0)
+        points = np.bincount(inverse, weights=np.where(graded, grade, 0.0) * weight, minlength=len(ids))
+        credits = np.bincount(inverse, weights=weight, minlength=len(ids))
+        return {sid: round(p / c, 3) if c > 0 else 0.0
+                for sid, p, c in zip(ids.tolist(), points.tolist(), credits.tolist())}
+
+    points, credits = {}, {}
+    for sid, c, g in zip(cols["student_id"], cols["credits"], cols["grade"]):
+        if g != g:  # NaN: in progress
+            points.setdefault(sid, 0.0)
+            credits.setdefault(sid, 0)
+        else:
+            points[sid] = points.get(sid, 0.0) + g * c
+            credits[sid] = credits.get(sid, 0) + c
+    return {sid: round(points[sid] / c, 3) if c > 0 else 0.0 for sid, c in credits.items()}
+
+
+def grade_distribution(cols, edges: Sequence[float] = (0.0, 1.0, 2.0, 3.0, 4.0)) -> Dict[str, int]:
+    """Graded enrollments per [low, high) grade band (the last band includes its top), plus in-progress."""
+    labels = [f"{low:.1f}-{high:.1f}" for low, high in zip(edges, edges[1:])]
+    if _is_numpy(cols):
+        grade = cols["grade"]
+        graded = grade[~np.isnan(grade)]
+        counts = np.histogram(graded, bins=edges)[0].tolist()
+        in_progress = len(grade) - len(graded)
+    else:
+        counts, in_progress = [0] * len(labels), 0
+        for g in cols["grade"]:
+            if g != g:
+                in_progress += 1
+            elif edges[0] <= g <= edges[-1]:
+                counts[min(bisect_right(edges, g) - 1, len(counts) - 1)] += 1
+    return {**dict(zip(labels, counts)), "in progress": in_progress}
+
+
+def course_stats(cols) -> Dict[int, Dict]:
+    """Per course id: enrolled, graded and in-progress counts and the average / min / max grade."""
+    if _is_numpy(cols):
+        grade = cols["grade"]
+        graded = ~np.isnan(grade)
+        ids, inverse = np.unique(cols["course_id"], return_inverse=True)
+        n = len(ids)
+        enrolled = np.bincount(inverse, minlength=n)
+        graded_inverse, graded_values = inverse[graded], grade[graded]
+        graded_count = np.bincount(graded_inverse, minlength=n)
+        sums = np.bincount(graded_inverse, weights=graded_values, minlength=n)
+        low = np.full(n, np.inf)
+        high = np.full(n, -np.inf)
+        np.minimum.at(low, graded_inverse, graded_values)
+        np.maximum.at(high, graded_inverse, graded_values)
+        per_course = zip(ids.tolist(), enrolled.tolist(), graded_count.tolist(), sums.tolist(),
+                         low.tolist(), high.tolist())
+    else:
+        totals = {}
+        for cid, g in zip(cols["course_id"], cols["grade"]):
+            t = totals.setdefault(cid, [0, 0, 0.0, math.inf, -math.inf])
+            t[0] += 1
+            if g == g:
+                t[1] += 1
+                t[2] += g
+                t[3] = min(t[3], g)
+                t[4] = max(t[4], g)
+        per_course = ((cid, *t) for cid, t in sorted(totals.items()))
+
+    return {cid: {"enrolled": enrolled, "graded": graded, "in_progress": enrolled - graded,
+                  "avg": round(total / graded, 3) if graded else None,
+                  "min": low if graded else None, "max": high if graded else None}
+            for cid, enrolled, graded, total, low, high in per_course}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar enrollment snapshot for analytics")
+    parser.add_argument("command", nargs="?", default="refresh", choices=["refresh", "gpa", "distribution", "courses", "verify"])
+    parser.add_argument("--db", default="student_grade_tracker.db", help="database file")
+    parser.add_argument("--path", default=DEFAULT_SNAPSHOT_PATH, help="snapshot directory")
+    parser.add_argument("--top", type=int, default=10, help="students listed by the gpa command")
+    args = parser.parse_args()
+
+    with DatabaseConnection(args.db, read_only=True) as db, EnrollmentSnapshot(args.path) as snapshot:
+        if args.command == "verify":
+            try:
+                mismatched = snapshot.verify(db)
+            except ValueError as e:  # no snapshot written yet
+                print(e)
+                sys.exit(1)
+            if mismatched:
+                print(f"{len(mismatched):,} rows differ from the database, e.g. ids {mismatched[:10]}")
+                sys.exit(1)
+            print(f"All {snapshot.rows:,} snapshot rows match the database.")
+            return
+
+        start = time.perf_counter()
+        result = snapshot.refresh(db)
+        print(f"Snapshot {result['action']}: {result['rows']:,} rows, {result['appended']:,} appended, "
+              f"{result['patched']:,} patched in {(time.perf_counter() - start) * 1000:.1f} ms")
+        if args.command == "refresh":
+            return
+
+        start = time.perf_counter()
+        cols = snapshot.columns()
+        if args.command == "gpa":
+            gpas = gpa_by_student(cols)
+            elapsed = time.perf_counter() - start
+            best = sorted(gpas.items(), key=lambda item: (-item[1], item[0]))[:args.top]
+            print_table(["Student ID", "GPA"], best)
+            if gpas:
+                print(f"\n{len(gpas):,} students, mean GPA {sum(gpas.values()) / len(gpas):.3f}")
+        elif args.command == "distribution":
+            distribution = grade_distribution(cols)
+            elapsed = time.perf_counter() - start
+            print_table(["Grade", "Enrollments"], list(distribution.items()))
+        else:
+            stats = course_stats(cols)
+            elapsed = time.perf_counter() - start
+            codes = dict(db.execute("SELECT id, course_code FROM courses").fetchall())
+            print_table(["Course", "Enrolled", "Graded", "In Progress", "Avg", "Min", "Max"],
+                        [(codes.get(cid, cid), s["enrolled"], s["graded"], s["in_progress"], s["avg"], s["min"], s["max"])
+                         for cid, s in stats.items()])
+        print(f"Computed in {elapsed * 1000:.1f} ms ({'numpy' if np is not None else 'pure Python'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import queue
+import random
+import sqlite3
+import time
+from multiprocessing import Process, Queue
+from typing import Dict, List
+from database import DatabaseConnection, CommitPolicy, is_locked_error, lock_backoff, lock_retries
+from models import Student, Course, Enrollment, StudentManager, CourseManager, EnrollmentManager
+
+
+def seed(db_path: str, students: int, courses: int):
+    """Create a database with `students` students, `courses` courses and a few enrollments each."""
+    with DatabaseConnection(db_path) as db:
+        db.create_tables()
+        db.enable_wal()
+        if db.execute("SELECT COUNT(*) FROM students").fetchone()[0]:
+            return
+        with db.unit_of_work():
+            student_ids = [StudentManager(db).add_student(
+                Student(name=f"Student {i}", email=f"student{i}@stress.test", major="Stress", year=1 + i % 4))
+                for i in range(students)]
+            course_ids = [CourseManager(db).add_course(
+                Course(course_code=f"ST{i:04d}", course_name=f"Stress course {i}", credits=1 + i % 4))
+                for i in range(courses)]
+            enroll_mgr = EnrollmentManager(db)
+            for sid in student_ids:
+                for cid in random.sample(course_ids, min(3, len(course_ids))):
+                    enroll_mgr.enroll_student(Enrollment(student_id=sid, course_id=cid, grade=round(random.uniform(0, 4), 1)))
+
+
+def _writer(db_path: str, seconds: float, busy_timeout: float, results: Queue):
+    latencies, waits, errors = [], [], 0
+    with DatabaseConnection(db_path, commit_policy=CommitPolicy("operation"), busy_timeout=busy_timeout) as db:
+        pairs = db.execute("SELECT student_id, course_id FROM enrollments").fetchall()
+        enroll_mgr = EnrollmentManager(db)
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            sid, cid = random.choice(pairs)
+            start = time.perf_counter()
+            backoff = sum(lock_backoff.values())
+            try:
+                # Take the write lock explicitly so the time spent waiting for it can be told apart
+                # from the update itself (bypasses db.execute, which would commit straight away)
+                try:
+                    db.connection.execute("BEGIN IMMEDIATE")
+                finally:
+                    wait = time.perf_counter() - start
+                enroll_mgr.update_grade(sid, cid, round(random.uniform(0, 4), 1))
+            except sqlite3.OperationalError as e:
+                if not is_locked_error(e):
+                    raise
+                errors += 1
+                db.rollback()
+            latencies.append(time.perf_counter() - start)
+            waits.append(wait + sum(lock_backoff.values()) - backoff)
+    results.put(("writer", latencies, waits, errors, sum(lock_retries.values())))
+
+
+def _reader(db_path: str, seconds: float, busy_timeout: float, results: Queue):
+    latencies, waits, errors = [], [], 0
+    with DatabaseConnection(db_path, busy_timeout=busy_timeout) as db:
+        ids = [sid for (sid,) in db.execute("SELECT id FROM students").fetchall()]
+        enroll_mgr = EnrollmentManager(db)
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            backoff = sum(lock_backoff.values())
+            try:
+                enroll_mgr.calculate_gpa(random.choice(ids))
+            except sqlite3.OperationalError as e:
+                if not is_locked_error(e):
+                    raise
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+            # WAL readers never queue for the write lock; their only lock wait is retry backoff
+            waits.append(sum(lock_backoff.values()) - backoff)
+    results.put(("reader", latencies, waits, errors, sum(lock_retries.values())))
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(db_path: str, writers: int, readers: int, seconds: float, busy_timeout: float) -> Dict[str, Dict]:
+    """
+    Run `writers` writer and `readers` reader processes against one file for `seconds` seconds.
+    Returns per role: operations, throughput, locked errors, retries, latency percentiles and,
+    separately, lock-wait percentiles (time blocked on BEGIN IMMEDIATE plus retry backoff; it is
+    also part of the latency). Raises RuntimeError if a process dies or stops reporting.
+    """
+    results = Queue()
+    processes = ([Process(target=_writer, args=(db_path, seconds, busy_timeout, results)) for _ in range(writers)]
+                 + [Process(target=_reader, args=(db_path, seconds, busy_timeout, results)) for _ in range(readers)])
+    for p in processes:
+        p.start()
+    # Generous bound: the run itself, one last busy wait and a full round of retry backoff
+    give_up = time.monotonic() + seconds + busy_timeout + 30
+    collected = []
+    try:
+        while len(collected) < len(processes):
+            try:
+                collected.append(results.get(timeout=1.0))
+            except queue.Empty:
+                failed = [p for p in processes if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"{len(failed)} stress process(es) died (exit code {failed[0].exitcode})")
+                if time.monotonic() > give_up:
+                    raise RuntimeError(f"only {len(collected)} of {len(processes)} stress processes reported back")
+    finally:
+        for p in processes:
+            if len(collected) < len(processes):
+                p.terminate()
+            p.join()
+
+    report = {}
+    for role in ("writer", "reader"):
+        latencies = [l for r, lats, _, _, _ in collected if r == role for l in lats]
+        waits = [w for r, _, ws, _, _ in collected if r == role for w in ws]
+        if not latencies:
+            continue
+        report[role] = {
+            "processes": sum(1 for r, *_ in collected if r == role),
+            "ops": len(latencies),
+            "ops_per_sec": round(len(latencies) / seconds, 1),
+            "locked_errors": sum(e for r, _, _, e, _ in collected if r == role),
+            "retries": sum(n for r, _, _, _, n in collected if r == role),
+            **{f"p{pct}_ms": round(_percentile(latencies, pct) * 1000, 3) for pct in (50, 90, 99)},
+            "max_ms": round(max(latencies) * 1000, 3),
+            **{f"wait_p{pct}_ms": round(_percentile(waits, pct) * 1000, 3) for pct in (50, 90, 99)},
+            "wait_max_ms": round(max(waits) * 1000, 3),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent writer/reader stress test for the grade tracker database")
+    parser.add_argument("--db", default="stress_test.db", help="database file (seeded if empty)")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--busy-timeout", type=float, default=5.0)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--courses", type=int, default=50)
+    args = parser.parse_args()
+
+    seed(args.db, args.students, args.courses)
+    report = run(args.db, args.writers, args.readers, args.seconds, args.busy_timeout)
+
+    for role, stats in report.items():
+        print(f"\n{role}s")
+        for name, value in stats.items():
+            print(f"  {name:<14}{value}")
+
+
+if __name__ == "__main__":
+    main()
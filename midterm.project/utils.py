@@ -1,7 +1,20 @@
 import csv
+import sqlite3
+import time
+from collections import Counter
 from pathlib import Path
-from typing import List, Tuple
-from models import StudentManager, CourseManager, EnrollmentManager
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from models import StudentManager, EnrollmentManager
+
+# Imports commit (and checkpoint) in groups of this many rows instead of once per row or once per file
+IMPORT_COMMIT_ROWS = 5000
+# Seconds between progress lines during an import
+IMPORT_PROGRESS_SECONDS = 2.0
+# At most SKIP_LOG_BURST skipped-row messages are printed per SKIP_LOG_INTERVAL seconds
+SKIP_LOG_BURST = 20
+SKIP_LOG_INTERVAL = 5.0
+# How many bad rows a dry-run validation keeps as examples
+VALIDATION_SAMPLE_SIZE = 20
 
 
 def print_table(headers: List[str], rows: List[Tuple], widths: List[int] = None):
@@ -78,32 +91,219 @@ def export_enrollments_to_csv(db, filename: str = "enrollments_export.csv"):
     export_to_csv(filename, headers, rows)
 
 
-def export_gpa_report_to_csv(db, filename: str = "gpa_report.csv"):
-    """Export GPA report for all students, including calculated GPA and total credits."""
+def gpa_report_rows(db) -> List[Tuple]:
+    """GPA report rows for all students, including calculated GPA and total credits."""
     student_mgr = StudentManager(db)
     enroll_mgr = EnrollmentManager(db)
     
-    students = student_mgr.get_all_students()
-    if not students:
-        print("No students to export.")
-        return
-    
-    headers = ["id", "name", "email", "major", "year", "gpa", "total_credits", "graded_courses"]
     rows = []
-    
-    for s in students:
+    for s in student_mgr.get_all_students():
         gpa = enroll_mgr.calculate_gpa(s.id)
         grades = enroll_mgr.get_grades_for_student(s.id)
         total_credits = sum(c for _, _, c, g in grades if g is not None)
         graded_courses = len([g for g in grades if g[3] is not None])
         
         rows.append((s.id, s.name, s.email, s.major, s.year, gpa if gpa else "N/A", total_credits, graded_courses))
+    return rows
+
+
+def export_gpa_report_to_csv(db, filename: str = "gpa_report.csv", cache=None):
+    """
+    Export GPA report for all students, including calculated GPA and total credits.
+    With a ReportCache the rows are reused as long as the database hasn't changed.
+    """
+    rows = cache.call(db, gpa_report_rows) if cache else gpa_report_rows(db)
+    if not rows:
+        print("No students to export.")
+        return
     
+    headers = ["id", "name", "email", "major", "year", "gpa", "total_credits", "graded_courses"]
     export_to_csv(filename, headers, rows)
 
 
-def import_students_from_csv(db, filename: str) -> int:
-    """Import students from CSV. Skips invalid rows. Returns number added."""
+class RateLimitedLog:
+    """Prints at most `burst` messages per `interval` seconds and counts the ones it drops."""
+
+    def __init__(self, burst: int = SKIP_LOG_BURST, interval: float = SKIP_LOG_INTERVAL):
+        self.burst = burst
+        self.interval = interval
+        self.suppressed = 0
+        self._window_start = time.monotonic()
+        self._printed = 0
+
+    def log(self, message: str):
+        now = time.monotonic()
+        if now - self._window_start >= self.interval:
+            self.flush()
+            self._window_start = now
+            self._printed = 0
+
+        if self._printed < self.burst:
+            print(message)
+            self._printed += 1
+        else:
+            self.suppressed += 1
+
+    def flush(self):
+        if self.suppressed:
+            print(f"... {self.suppressed} more skipped rows not shown")
+            self.suppressed = 0
+
+
+def _load_checkpoint(db, kind: str, path: Path) -> Optional[Tuple]:
+    """Return (byte_offset, row_number, added, skipped, batches) of an interrupted import of this file."""
+    stat = path.stat()
+    row = db.execute("""
+        SELECT file_size, file_mtime_ns, byte_offset, row_number, added, skipped, batches
+        FROM import_checkpoints
+        WHERE kind = ? AND filename = ?
+    """, (kind, str(path.resolve()))).fetchone()
+    if not row:
+        return None
+    if (row[0], row[1]) != (stat.st_size, stat.st_mtime_ns):
+        print(f"{path.name} changed since the interrupted import; starting over.")
+        _clear_checkpoint(db, kind, path)
+        return None
+    return row[2:]
+
+
+def _save_checkpoint(db, kind: str, path: Path, byte_offset: int, row_number: int,
+                     added: int, skipped: int, batches: int):
+    stat = path.stat()
+    db.execute("""
+        INSERT OR REPLACE INTO import_checkpoints
+            (kind, filename, file_size, file_mtime_ns, byte_offset, row_number, added, skipped, batches, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    """, (kind, str(path.resolve()), stat.st_size, stat.st_mtime_ns,
+          byte_offset, row_number, added, skipped, batches))
+
+
+def _clear_checkpoint(db, kind: str, path: Path):
+    db.execute("DELETE FROM import_checkpoints WHERE kind = ? AND filename = ?", (kind, str(path.resolve())))
+
+
+STUDENT_COLUMNS = ["name", "email", "major", "year"]
+ENROLLMENT_COLUMNS = ["student_email", "course_code"]
+
+
+def _parse_student_row(name: str, email: str, major: str, year: str) -> Tuple[str, str, str, int]:
+    """Row rules shared by import_students_from_csv and its dry run. Raises ValueError."""
+    name, email, major = name.strip(), email.strip(), major.strip()
+    if not name or not email or not major:
+        raise ValueError("Missing value")
+    try:
+        year = int(year.strip())
+    except ValueError:
+        raise ValueError("Year is not a number")
+    if not 1 <= year <= 4:
+        raise ValueError("Year must be 1–4")
+    return name, email, major, year
+
+
+def _parse_enrollment_row(email: str, code: str, grade_str: str, student_ids: Dict[str, int],
+                          course_ids: Dict[str, int]) -> Tuple[int, int, Optional[float]]:
+    """
+    Row rules shared by import_enrollments_from_csv and its dry run: (student_id, course_id, grade)
+    from lookups by lower-cased email and upper-cased course code. Raises ValueError.
+    """
+    student_id = student_ids.get(email.strip().lower())
+    course_id = course_ids.get(code.strip().upper())
+    if not student_id and not course_id:
+        raise ValueError("Unknown student and course")
+    if not student_id:
+        raise ValueError("Unknown student")
+    if not course_id:
+        raise ValueError("Unknown course")
+
+    grade_str = grade_str.strip()
+    grade = None
+    if grade_str and grade_str.lower() != "none":
+        try:
+            grade = float(grade_str)
+        except ValueError:
+            raise ValueError("Grade is not a number")
+        if not 0 <= grade <= 4.0:
+            raise ValueError("Grade must be 0.0–4.0")
+    return student_id, course_id, grade
+
+
+def _run_import(db, path: Path, kind: str, expected: Set[str],
+                handle_row: Callable[[Dict], None], resume: bool = True) -> Optional[Tuple[int, int]]:
+    """
+    Shared resumable import loop. Each row goes to handle_row(row); ValueError, KeyError or
+    IntegrityError from it counts the row as skipped. Every IMPORT_COMMIT_ROWS rows the batch is
+    committed together with a checkpoint (byte offset + row number), so rerunning after a crash
+    continues after the last committed batch. Called inside a caller's unit_of_work, the whole
+    import joins that scope instead and is committed with it. Returns (added, skipped) for the whole file, or
+    None if the header lacks an expected column.
+    """
+    added = skipped = batches = row_number = 0
+    checkpoint = _load_checkpoint(db, kind, path) if resume else None
+    if not resume:
+        _clear_checkpoint(db, kind, path)
+
+    skip_log = RateLimitedLog()
+    file_size = path.stat().st_size
+
+    with path.open("r", encoding="utf-8", newline="") as f, db.unit_of_work():
+        # Reading through readline() keeps f.tell() usable for checkpoints
+        reader = csv.DictReader(iter(f.readline, ""))
+        if reader.fieldnames is None or not expected.issubset(reader.fieldnames):
+            return None
+
+        if checkpoint:
+            offset, row_number, added, skipped, batches = checkpoint
+            f.seek(offset)
+            print(f"Resuming {path.name} after row {row_number} "
+                  f"({added} added, {skipped} skipped, {batches} batches committed)")
+
+        start = time.monotonic()
+        start_offset = f.tell()
+        start_row = row_number
+        next_progress = start + IMPORT_PROGRESS_SECONDS
+
+        for row in reader:
+            row_number += 1
+            try:
+                handle_row(row)
+                added += 1
+            except (ValueError, KeyError, sqlite3.IntegrityError) as e:
+                skipped += 1
+                skip_log.log(f"Skipped row {row_number}: {row}  →  {e}")
+
+            if (row_number - start_row) % IMPORT_COMMIT_ROWS == 0:
+                batches += 1
+                _save_checkpoint(db, kind, path, f.tell(), row_number, added, skipped, batches)
+                if db.unit_depth == 1:  # inside a caller's scope, that scope decides when to commit
+                    db.commit()
+
+            if row_number % 1000 == 0 and time.monotonic() >= next_progress:
+                now = time.monotonic()
+                elapsed = now - start
+                done_bytes = f.tell() - start_offset
+                rate = (row_number - start_row) / elapsed
+                eta = (file_size - f.tell()) * elapsed / done_bytes if done_bytes else 0
+                print(f"  {row_number:,} rows ({100 * f.tell() / file_size:.0f}%) - "
+                      f"{rate:,.0f} rows/s, ETA {eta:.0f}s")
+                next_progress = now + IMPORT_PROGRESS_SECONDS
+
+        skip_log.flush()
+        _clear_checkpoint(db, kind, path)
+
+    elapsed = time.monotonic() - start
+    if elapsed > 0 and row_number > start_row:
+        print(f"Processed {row_number - start_row:,} rows in {elapsed:.1f}s "
+              f"({(row_number - start_row) / elapsed:,.0f} rows/s)")
+    return added, skipped
+
+
+def import_students_from_csv(db, filename: str, resume: bool = True, dry_run: bool = False) -> int:
+    """
+    Import students from CSV. Skips invalid rows. Returns number added.
+    An interrupted import of the same file resumes from its last checkpoint unless resume=False.
+    With dry_run=True nothing is written: the file is only validated and the number of rows
+    that would be added is returned.
+    """
     from models import Student
     
     path = Path(filename)
@@ -111,39 +311,24 @@ def import_students_from_csv(db, filename: str) -> int:
         print(f"File not found: {filename}")
         return 0
     
+    if dry_run:
+        report = validate_students_csv(db, filename)
+        return report["valid"] if report else 0
+    
     mgr = StudentManager(db)
-    added = 0
-    skipped = 0
     
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            expected = {"name", "email", "major", "year"}
-            
-            if not expected.issubset(reader.fieldnames):
-                print("CSV must contain columns: name, email, major, year")
-                return 0
-            
-            for row in reader:
-                try:
-                    year = int(row["year"].strip())
-                    if not 1 <= year <= 4:
-                        raise ValueError("Year must be 1–4")
-                    
-                    student = Student(
-                        name=row["name"].strip(),
-                        email=row["email"].strip(),
-                        major=row["major"].strip(),
-                        year=year
-                    )
-                    
-                    mgr.add_student(student)
-                    added += 1
-                    
-                except (ValueError, KeyError, sqlite3.IntegrityError) as e:
-                    skipped += 1
-                    print(f"Skipped row: {row}  →  {e}")
+    def add_row(row):
+        # Short rows leave None in the missing columns
+        name, email, major, year = _parse_student_row(*(row[c] or "" for c in STUDENT_COLUMNS))
+        mgr.add_student(Student(name=name, email=email, major=major, year=year))
     
+    try:
+        result = _run_import(db, path, "students", set(STUDENT_COLUMNS), add_row, resume)
+        if result is None:
+            print("CSV must contain columns: name, email, major, year")
+            return 0
+        
+        added, skipped = result
         print(f"\nImport complete: {added} students added, {skipped} skipped.")
         return added
         
@@ -152,10 +337,13 @@ def import_students_from_csv(db, filename: str) -> int:
         return 0
 
 
-def import_enrollments_from_csv(db, filename: str) -> int:
+def import_enrollments_from_csv(db, filename: str, resume: bool = True, dry_run: bool = False) -> int:
     """
     Import enrollments using student email + course_code (more user-friendly than IDs).
     Creates enrollment if student & course exist. Grade is optional.
+    An interrupted import of the same file resumes from its last checkpoint unless resume=False.
+    With dry_run=True nothing is written: the file is only validated and the number of rows
+    that would be added is returned.
     """
     from models import Enrollment
     
@@ -164,62 +352,161 @@ def import_enrollments_from_csv(db, filename: str) -> int:
         print(f"File not found: {filename}")
         return 0
     
-    student_mgr = StudentManager(db)
-    course_mgr = CourseManager(db)
+    if dry_run:
+        report = validate_enrollments_csv(db, filename)
+        return report["valid"] if report else 0
+    
     enroll_mgr = EnrollmentManager(db)
     
-    added = 0
-    skipped = 0
+    # Look students and courses up once instead of scanning both tables for every row
+    student_ids = {email.lower(): sid for sid, email in db.execute("SELECT id, email FROM students").fetchall()}
+    course_ids = {code.upper(): cid for cid, code in db.execute("SELECT id, course_code FROM courses").fetchall()}
     
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            expected = {"student_email", "course_code"}
-            
-            if not expected.issubset(reader.fieldnames):
-                print("CSV must contain at least: student_email, course_code")
-                print("(grade is optional)")
-                return 0
-            
-            for row in reader:
-                try:
-                    email = row["student_email"].strip()
-                    code = row["course_code"].strip()
-                    
-                    student = next((s for s in student_mgr.get_all_students() 
-                                  if s.email.lower() == email.lower()), None)
-                    
-                    course = next((c for c in course_mgr.get_all_courses() 
-                                 if c.course_code.upper() == code.upper()), None)
-                    
-                    if not student or not course:
-                        raise ValueError("Student or course not found")
-                    
-                    grade_str = row.get("grade", "").strip()
-                    grade = float(grade_str) if grade_str and grade_str.lower() != "none" else None
-                    
-                    if grade is not None and not 0 <= grade <= 4.0:
-                        raise ValueError("Grade must be 0.0–4.0")
-                    
-                    enroll = Enrollment(
-                        student_id=student.id,
-                        course_id=course.id,
-                        grade=grade
-                    )
-                    
-                    if enroll_mgr.enroll_student(enroll):
-                        added += 1
-                    else:
-                        skipped += 1
-                        print(f"Already enrolled: {email} → {code}")
-                        
-                except (ValueError, KeyError) as e:
-                    skipped += 1
-                    print(f"Skipped row: {row}  →  {e}")
+    def add_row(row):
+        email = row["student_email"] or ""
+        code = row["course_code"] or ""
+        student_id, course_id, grade = _parse_enrollment_row(email, code, row.get("grade") or "",
+                                                             student_ids, course_ids)
+        
+        enroll = Enrollment(
+            student_id=student_id,
+            course_id=course_id,
+            grade=grade
+        )
+        
+        if not enroll_mgr.enroll_student(enroll):
+            raise ValueError(f"Already enrolled: {email.strip()} → {code.strip()}")
     
+    try:
+        result = _run_import(db, path, "enrollments", set(ENROLLMENT_COLUMNS), add_row, resume)
+        if result is None:
+            print("CSV must contain at least: student_email, course_code")
+            print("(grade is optional)")
+            return 0
+        
+        added, skipped = result
         print(f"\nImport complete: {added} enrollments added, {skipped} skipped.")
         return added
         
     except Exception as e:
         print(f"Failed to read CSV: {e}")
         return 0
+
+
+def _validate_csv(filename: str, expected: List[str], optional: List[str], check_row,
+                  sample_size: int) -> Optional[Dict]:
+    """
+    Stream a CSV and collect check_row(values) problems without touching the database.
+    check_row gets the row's values for expected + optional columns (missing optional columns
+    and the missing tail of short rows come through as "") and returns an error string or None.
+    The header is read exactly like the csv.DictReader of the real import.
+    """
+    path = Path(filename)
+    if not path.is_file():
+        print(f"File not found: {filename}")
+        return None
+
+    report = {"file": path.name, "rows": 0, "valid": 0, "missing_columns": [],
+              "errors": Counter(), "samples": []}
+
+    with path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        # Not stripped, like DictReader; a repeated name maps to its last column, also like DictReader
+        columns = {name: i for i, name in enumerate(next(reader, []))}
+        report["missing_columns"] = [c for c in expected if c not in columns]
+        if report["missing_columns"]:
+            return report
+
+        # Plain csv.reader plus fixed column positions is much faster than DictReader on big files
+        positions = [columns.get(c) for c in expected + optional]
+        errors = report["errors"]
+        samples = report["samples"]
+        rows = valid = 0
+
+        for row_number, row in enumerate(reader, start=1):
+            if not row:
+                continue
+            rows += 1
+            values = [row[i] if i is not None and i < len(row) else "" for i in positions]
+            error = check_row(values)
+            if error is None:
+                valid += 1
+                continue
+            errors[error] += 1
+            if len(samples) < sample_size:
+                samples.append((row_number, error, row))
+
+        report["rows"] = rows
+        report["valid"] = valid
+    return report
+
+
+def _print_validation_report(report: Dict):
+    print(f"\nDry run of {report['file']} - nothing was written.")
+    if report["missing_columns"]:
+        print(f"Missing columns: {', '.join(report['missing_columns'])}")
+        return
+
+    print(f"{report['rows']} rows: {report['valid']} would be imported, {report['rows'] - report['valid']} would be skipped.")
+    if report["errors"]:
+        print_table(["Problem", "Rows"], report["errors"].most_common())
+        print(f"\nFirst {len(report['samples'])} bad rows:")
+        for row_number, error, row in report["samples"]:
+            print(f"  row {row_number}: {error}  →  {','.join(row)}")
+
+
+def validate_students_csv(db, filename: str, sample_size: int = VALIDATION_SAMPLE_SIZE) -> Optional[Dict]:
+    """
+    Dry run of import_students_from_csv: reports missing columns, empty values, bad years and
+    emails that repeat within the file or already exist, without writing anything.
+    Returns the report (aggregate counts in "errors", up to sample_size examples in "samples").
+    """
+    db_emails = {email for (email,) in db.execute("SELECT email FROM students")}
+    file_emails = set()
+
+    def check_row(values):
+        try:
+            _, email, _, _ = _parse_student_row(*values)
+        except ValueError as e:
+            return str(e)
+        if email in db_emails:
+            return "Email already in database"
+        if email in file_emails:
+            return "Duplicate email in file"
+        file_emails.add(email)
+        return None
+
+    report = _validate_csv(filename, STUDENT_COLUMNS, [], check_row, sample_size)
+    if report:
+        _print_validation_report(report)
+    return report
+
+
+def validate_enrollments_csv(db, filename: str, sample_size: int = VALIDATION_SAMPLE_SIZE) -> Optional[Dict]:
+    """
+    Dry run of import_enrollments_from_csv: reports missing columns, unknown students and courses,
+    bad grades, and enrollments repeated within the file or already in the database, without
+    writing anything. Returns the report like validate_students_csv.
+    """
+    student_ids = {email.lower(): sid for sid, email in db.execute("SELECT id, email FROM students")}
+    course_ids = {code.upper(): cid for cid, code in db.execute("SELECT id, course_code FROM courses")}
+    enrolled = set(db.execute("SELECT student_id, course_id FROM enrollments"))
+    seen = set()
+
+    def check_row(values):
+        try:
+            student_id, course_id, _ = _parse_enrollment_row(*values, student_ids, course_ids)
+        except ValueError as e:
+            return str(e)
+        key = (student_id, course_id)
+        if key in enrolled:
+            return "Already enrolled in database"
+        if key in seen:
+            return "Duplicate enrollment in file"
+        seen.add(key)
+        return None
+
+    report = _validate_csv(filename, ENROLLMENT_COLUMNS, ["grade"], check_row, sample_size)
+    if report:
+        _print_validation_report(report)
+    return report